@@ -0,0 +1,60 @@
+"""Measure the memory used by resolved configoose entries
+
+Usage::
+
+    python benchmarks/memory_footprint.py [-n COUNT]
+
+A :class:`MarinaDict` is filled with COUNT serialized :class:`FileInOsMediator`
+instances. All the addresses are then resolved and the resulting mediators
+kept in memory together with a :class:`Preamble` and an
+:class:`AddedProtocol` per entry, as a long-running process caching its
+configurations would do. The memory allocated for the resolved objects is
+measured with :mod:`tracemalloc`.
+"""
+import argparse
+import gc
+import tracemalloc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", dest="count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    from configoose.configurator import AddedProtocol
+    from configoose.database import (
+        Db,
+        FileInOsMediator,
+        MarinaDict,
+        mediator_dumps,
+    )
+    from configoose.util.split_preamble import Preamble
+
+    marina = MarinaDict(tags={"bench"})
+    for i in range(args.count):
+        path = f"/srv/configs/group-{i % 100:03d}/config-{i:06d}.py"
+        marina[f"bench-{i:06d}"] = mediator_dumps(FileInOsMediator(path))
+    db = Db(marina)
+    # the addresses, as a client would read them from its own sources
+    addresses = [f"bench-{i:06d}" for i in range(args.count)]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    resolved = {}
+    for address in addresses:
+        mediator = db[address]
+        preamble = Preamble(address=address, protopath="raw")
+        resolved[address] = (mediator, preamble, AddedProtocol((), {}))
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    print(f"entries:          {args.count}")
+    print(f"total allocated:  {size / 2**20:.1f} MiB")
+    print(f"bytes per entry:  {size / args.count:.0f}")
+
+
+if __name__ == "__main__":
+    main()
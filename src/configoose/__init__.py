@@ -6,14 +6,32 @@ file system and other locations.
 
 .. data:: root_db
 
-    The global database used by configoose
+    The global database used by configoose. It is created and
+    initialized by :func:`init_root_db` on first access.
 """
 __version__ = "2024.06.21"
 
-from . import configurator, database
+from . import configurator
+from .configurator import run_all
+import os
 import sys
+import threading
 
-root_db = database.Db()
+_root_db_lock = threading.RLock()
+_root_db_pending = None
+
+
+def __getattr__(name):
+    # root_db and the database subpackage are loaded lazily, so that
+    # importing configoose doesn't import marshmallow nor read the
+    # configooseconf modules until they are needed.
+    if name == "root_db":
+        return init_root_db()
+    elif name == "database":
+        from importlib import import_module
+
+        return import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class Configurator(configurator.AbstractConfigurator):
@@ -21,21 +39,65 @@ class Configurator(configurator.AbstractConfigurator):
 
     @property
     def database(self):
-        return root_db
+        return init_root_db()
 
 
 def init_root_db():
     """Initialize the root_db database
 
     This function is executed when
-    configoose is first imported. It processes the  modules :mod:`configooseconf`
+    :data:`root_db` is first accessed, either directly or by running a
+    :class:`Configurator`. It processes the  modules :mod:`configooseconf`
     and :mod:`userconfigooseconf`, if they exist, to populate the
     global database by adding marinas. It is not considered an error if these modules
     don't exist.
+
+    If the environment variable ``CONFIGOOSE_RESOLVER`` is set to the socket
+    path of a running resolver daemon (``python -m configoose serve``), the
+    root database forwards its lookups to the daemon instead, see
+    :mod:`configoose.database.resolver`. As this database is read only,
+    the command line interface ignores the variable except for the
+    subcommands that only look up addresses.
+
+    :return: the root database. Subsequent calls return the same database
+        without initializing it again.
     """
+    global root_db, _root_db_pending
+
+    if (db := globals().get("root_db")) is not None:
+        return db
+    with _root_db_lock:
+        if (db := globals().get("root_db")) is not None:
+            return db
+        if _root_db_pending is not None:
+            # reentrant call from the configuration modules
+            return _root_db_pending
+        if path := os.environ.get("CONFIGOOSE_RESOLVER"):
+            from .database import resolver
+
+            try:
+                root_db = resolver.connect(path)
+                return root_db
+            except OSError:
+                # no resolver daemon, initialize the database in process
+                pass
+        from . import database
+
+        try:
+            db = _root_db_pending = database.Db()
+            _populate_root_db(db)
+        finally:
+            _root_db_pending = None
+        root_db = db
+        return db
+
+
+def _populate_root_db(root_db):
     from importlib import import_module
     from importlib.util import find_spec
     from pathlib import Path
+    from . import database
+    from .database import style as marina_style
 
     # add a marina in memory to reference our configuration files
     marina = database.MarinaDict(tags={"memory"})
@@ -48,15 +110,18 @@ def init_root_db():
             pass
 
         def add_marina(self, style, **kwargs):
-            if style == "os-directory":
-                marina = database.MarinaDirInOs(
-                    Path(kwargs["path"]), tags=kwargs.get("tags", ())
-                )
-                root_db.path.append(marina)
-            elif extension := kwargs.get("extension", None):
+            extension = kwargs.get("extension", None)
+            if extension and not marina_style.is_registered(style):
                 # add a marina through an extension module
                 mod = import_module(extension)
                 mod.add_marina(self, style, **kwargs)
+            else:
+                # registered style or style declared as an entry point
+                try:
+                    factory = marina_style.factory(style)
+                except marina_style.UnknownStyle:
+                    return
+                root_db.path.append(factory(**kwargs))
 
     protopath = f"{__name__}.protocol.methodic.Protocol"
 
@@ -74,6 +139,3 @@ def init_root_db():
             cfg = Configurator(address)
             cfg.add_protocol(protopath, handler=Handler)
             cfg.run(missing_ok=True)
-
-
-init_root_db()
@@ -1,10 +1,11 @@
 from .util import format_desc, random_address, top_package
+from ..protocol import registry
 from ..util.algorithm import algorithm
-from ..util.digattr import dig
 from ..util.dispatcher import PolymorphicDispatcher
 import argparse
 from functools import wraps
 from importlib import import_module
+import os
 from pathlib import Path
 
 
@@ -89,6 +90,10 @@ class main(algorithm):
                 self.print_help(parser)
                 return
 
+        from . import subcommand
+
+        if command not in subcommand.resolver_commands:
+            os.environ.pop("CONFIGOOSE_RESOLVER", None)
         callback(command, args[1:])
 
     def print_help(self, parser):
@@ -118,9 +123,14 @@ def gather_command():
     # f'{top_package.__name__}.cli.subcommand'. Submodules without a .main
     # attribute are not listed. The command's name is the submodule's
     # name where underscores '_' are replaced by dash '-'.
+    # Descriptions are read from subcommand.manifest when available, to
+    # avoid importing the submodule.
     for mod_info in iter_modules(subcommand.__path__):
-        mod = import_module(f".{mod_info.name}", subcommand.__name__)
         name = mod_info.name.replace("_", "-")
+        if name in subcommand.manifest:
+            gathering.append((name, subcommand.manifest[name]))
+            continue
+        mod = import_module(f".{mod_info.name}", subcommand.__name__)
         if callback := getattr(mod, "main", None):
             gathering.append((name, get_short_desc(callback)))
     gathering.sort()
@@ -259,7 +269,7 @@ def template_(command, args):
     "protopath" : "{ns.protocol}",
 }}
 """
-    protoclass = dig(*ns.protocol.split("."))
+    protoclass = registry.resolve(ns.protocol)
     text = preamble + protoclass.template_text()
     if ns.output and ns.output != "-":
         Path(ns.output).write_text(text)
@@ -0,0 +1,23 @@
+# Static manifest of the subcommands defined as main() functions in the
+# submodules of this package: command name -> short description. It
+# enables the command line interface to print its help without importing
+# every submodule. Submodules missing from the manifest are still listed,
+# at the price of an import. Keep the descriptions in sync with the first
+# line of the main() docstrings.
+manifest = {
+    "check": "Dry-run every moored configuration",
+    "conf": "Create file `configooseconf.py` or `userconfigooseconf.py`",
+    "find": "Find configuration file",
+    "fsck": "Check the entries of all marinas",
+    "moor": "Moor a configuration file in a marina",
+    "profile": "Profile the execution of a configuration",
+    "resolve": "Resolve many addresses as JSON lines",
+    "serve": "Run a resolver daemon on a Unix socket",
+    "sync": "Synchronize a local mirror of a marina",
+    "unmoor": "Unmoor a configuration file",
+}
+
+# Subcommands that only look up addresses, thus can use a resolver daemon.
+# The environment variable CONFIGOOSE_RESOLVER is ignored by the others,
+# which need the actual marinas.
+resolver_commands = {"check", "find", "profile", "resolve"}
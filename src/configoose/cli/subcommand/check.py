@@ -0,0 +1,211 @@
+from ..util import RecordingHandler, format_desc, top_package
+from .fsck import print_progress
+import argparse
+import json
+import os
+import time
+
+
+def main(command, args):
+    """Dry-run every moored configuration
+
+    Implementation of the :code:`check` subcommand which usage string is
+
+    .. code-block:: text
+
+        usage: python -m configoose check [-h] [-j JOBS] [-s N] [-q] [--json] [ADDRESS ...]
+
+        Run every configuration of the database with a recording handler in
+        a pool of processes, and report failures and timings.
+
+        positional arguments:
+        ADDRESS               addresses to check, defaults to all the addresses
+                                of the database
+
+        options:
+        -h, --help            show this help message and exit
+        -j JOBS, --jobs JOBS  number of worker processes, defaults to the
+                                number of CPUs
+        -s N, --slowest N     number of slowest configurations to report,
+                                defaults to 10
+        -q, --quiet           don't print progress to standard error
+        --json                print one JSON object per configuration instead
+                                of a report
+
+    Each configuration is looked up, read, its preamble parsed, its
+    protocol loaded and run with a :class:`RecordingHandler` registered
+    as handler, thus no client program is involved. Each configuration
+    runs in its own freshly spawned process, so that it cannot disturb
+    the current process nor the other configurations, for example by
+    changing :data:`sys.path` or :data:`os.environ`. The exit status is 1
+    if a configuration failed, else 0.
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"python -m {top_package.__name__} {command}",
+        description=format_desc(
+            """\
+            >Run every configuration of the database with a recording handler in
+            a pool of processes, and report failures and timings."""
+        ),
+    )
+    parser.add_argument(
+        "addresses",
+        nargs="*",
+        metavar="ADDRESS",
+        help="addresses to check, defaults to all the addresses of the database",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=None,
+        metavar="JOBS",
+        help="number of worker processes, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "-s",
+        "--slowest",
+        dest="slowest",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest configurations to report, defaults to 10",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        dest="quiet",
+        action="store_true",
+        help="don't print progress to standard error",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json",
+        action="store_true",
+        help="print one JSON object per configuration instead of a report",
+    )
+    args = parser.parse_args(args)
+
+    addresses = args.addresses or list(top_package.root_db)
+    progress = None if args.quiet or args.json else print_progress
+    start = time.perf_counter()
+    results = check(addresses, jobs=args.jobs, progress=progress)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        for res in results:
+            print(json.dumps(res))
+    else:
+        print_report(results, elapsed, args.slowest)
+    if any(res["status"] != "ok" for res in results):
+        raise SystemExit(1)
+
+
+def check(addresses, jobs=None, progress=None):
+    """Dry-run configurations in a pool of processes
+
+    :param addresses: an iterable of configuration addresses
+    :param jobs: number of processes running at the same time, defaults
+        to the number of CPUs
+    :param progress: a callable `progress(done, total)` called after each
+        checked configuration, or None
+    :return: a list of dicts returned by :func:`check_one`, in the order
+        of the addresses
+
+    Each configuration runs in a new spawned process, which initializes
+    its own root database. If the process dies, the configuration is
+    reported with the status `"crashed"`.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    addresses = list(dict.fromkeys(addresses))
+    results = {}
+    with ThreadPoolExecutor(jobs or os.cpu_count()) as executor:
+        futures = {executor.submit(check_isolated, a): a for a in addresses}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(done, len(addresses))
+    return [results[a] for a in addresses]
+
+
+def check_isolated(address):
+    """Run :func:`check_one` in a new spawned process and return its result"""
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    with ProcessPoolExecutor(
+        1, mp_context=mp.get_context("spawn"), initializer=top_package.init_root_db
+    ) as executor:
+        try:
+            return executor.submit(check_one, address).result()
+        except BrokenProcessPool as exc:
+            return {
+                "address": address,
+                "status": "crashed",
+                "stage": None,
+                "error": repr(exc),
+                "time": 0.0,
+            }
+
+
+def check_one(address):
+    """Dry-run a single configuration in the current process
+
+    :param address: a configuration address
+    :return: a JSON serializable dict with the keys `address`, `status`
+        (`"ok"` or `"failed"`), `stage` (the stage that failed, one of
+        `"lookup"`, `"read"`, `"preamble"`, `"protocol"` and `"run"`, or
+        None), `error` (None or the exception's repr), `time` (the time
+        in seconds to read and run the configuration) and, if they are
+        known, `mediator`, `protopath` and `handler_calls`.
+    """
+    from ...configurator import AddedProtocol
+    from ...protocol import registry
+    from ...util.split_preamble import split_preamble
+
+    res = {"address": address, "status": "ok", "stage": None, "error": None}
+    stage = "lookup"
+    start = time.perf_counter()
+    try:
+        mediator = top_package.root_db[address]
+        res["mediator"] = repr(mediator)
+        stage = "read"
+        with mediator.open_text() as stream:
+            stage = "preamble"
+            preamble = split_preamble(stream)
+            res["protopath"] = preamble["protopath"]
+            if preamble["address"] != address:
+                raise ValueError("Preamble address is", preamble["address"])
+            stage = "protocol"
+            protocol = registry.instance(preamble["protopath"])
+            stage = "run"
+            handler = RecordingHandler()
+            ap = AddedProtocol((), {"handler": handler})
+            protocol.run_stream(ap, preamble, stream, mediator)
+            res["handler_calls"] = len(handler.calls)
+    except (Exception, SystemExit) as exc:
+        res.update(status="failed", stage=stage, error=repr(exc))
+    res["time"] = time.perf_counter() - start
+    return res
+
+
+def print_report(results, elapsed, slowest=10):
+    """Print the results of :func:`check` in a human readable form"""
+    failed = [res for res in results if res["status"] != "ok"]
+    for res in failed:
+        print(res["status"], res["address"], res["stage"], res["error"], sep="\t")
+    if failed:
+        print()
+    if slowest > 0 and results:
+        print("slowest configurations:")
+        ranked = sorted(results, key=lambda res: res["time"], reverse=True)
+        for res in ranked[:slowest]:
+            print(f"  {res['time'] * 1000:>10.3f} ms  {res['address']}")
+        print()
+    total = sum(res["time"] for res in results)
+    print(
+        f"checked {len(results)} configurations, {len(failed)} failed,"
+        f" {total:.3f}s of configuration time in {elapsed:.3f}s"
+    )
@@ -0,0 +1,184 @@
+from ..util import format_desc, top_package
+from ...util.split_preamble import split_preamble
+import argparse
+from collections import namedtuple
+import sys
+
+Problem = namedtuple("Problem", "kind marina key detail")
+
+# kinds of problems that --prune removes from their marina
+PRUNABLE = {"dangling"}
+
+# kinds of problems that are reported but don't change the exit status
+INFORMATIONAL = {"shadowed"}
+
+
+def main(command, args):
+    """Check the entries of all marinas
+
+    Implementation of the :code:`fsck` subcommand which usage string is
+
+    .. code-block:: text
+
+        usage: python -m configoose fsck [-h] [-j JOBS] [-q] [--prune]
+
+        Check the entries of all the marinas of the database.
+
+        options:
+        -h, --help            show this help message and exit
+        -j JOBS, --jobs JOBS  number of threads used to read entries and
+                                configurations, defaults to 32
+        -q, --quiet           don't print progress to standard error
+        --prune               remove dangling entries from their marinas
+
+    Every entry of every marina is deserialized, the configuration it
+    points to is read and its preamble parsed. One line is printed for each
+    problem found, with the kind of the problem, the marina, the address
+    and details. The kinds of problems are
+
+    * undeserializable: the entry is not a serialized mediator
+    * dangling: the configuration doesn't exist
+    * unreadable: the configuration exists but cannot be read, for
+      example because of its permissions
+    * bad-preamble: the configuration's preamble cannot be parsed
+    * address-mismatch: the preamble's address is not the entry's address
+    * shadowed: a marina earlier in the database has the same address.
+      This is informational, as it is the normal effect of overriding
+      a configuration in an earlier marina.
+
+    Only dangling entries are pruned, and never in read only marinas.
+    The exit status is 1 if problems other than shadowed entries remain,
+    else 0.
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"python -m {top_package.__name__} {command}",
+        description=format_desc(
+            """\
+            >Check the entries of all the marinas of the database."""
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=32,
+        metavar="JOBS",
+        help="number of threads used to read entries and configurations, defaults to 32",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        dest="quiet",
+        action="store_true",
+        help="don't print progress to standard error",
+    )
+    parser.add_argument(
+        "--prune",
+        dest="prune",
+        action="store_true",
+        help="remove dangling entries from their marinas",
+    )
+    args = parser.parse_args(args)
+
+    progress = None if args.quiet else print_progress
+    remaining = 0
+    for problem in fsck(top_package.root_db, jobs=args.jobs, progress=progress):
+        pruned = (
+            args.prune
+            and problem.kind in PRUNABLE
+            and not problem.marina.read_only
+        )
+        if pruned:
+            del problem.marina[problem.key]
+        elif problem.kind not in INFORMATIONAL:
+            remaining += 1
+        print(
+            problem.kind,
+            problem.marina,
+            problem.key,
+            problem.detail + (" (pruned)" if pruned else ""),
+            sep="\t",
+        )
+    if remaining:
+        raise SystemExit(1)
+
+
+def print_progress(done, total):
+    """Print a progress line to standard error, about every percent"""
+    if done != total and done % max(1, total // 100):
+        return
+    end = "\n" if done == total else ""
+    print(f"\rchecked {done}/{total} entries", end=end, file=sys.stderr, flush=True)
+
+
+def fsck(db, jobs=32, progress=None):
+    """Check the entries of the marinas of a database
+
+    :param db: a :class:`Db` instance
+    :param jobs: number of threads used to read entries and configurations
+    :param progress: a callable `progress(done, total)` called after each
+        checked entry, or None
+    :return: a list of :class:`Problem` instances, in the order of the marinas
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    marinas = db.snapshot()
+    entries = [(i, key) for i, marina in enumerate(marinas) for key in marina]
+    found = {}
+    with ThreadPoolExecutor(jobs) as executor:
+        futures = {
+            executor.submit(check_entry, marinas[i], key): (i, key)
+            for i, key in entries
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            found[futures[future]] = future.result()
+            if progress:
+                progress(done, len(entries))
+    problems = []
+    seen = set()
+    for i, key in entries:
+        if problem := found[i, key]:
+            problems.append(problem)
+        if key in seen:
+            problems.append(
+                Problem("shadowed", marinas[i], key, "hidden by an earlier marina")
+            )
+        seen.add(key)
+    return problems
+
+
+def check_entry(marina, key):
+    """Check a single marina entry
+
+    :return: a :class:`Problem` instance or None
+    """
+    from ...database import mediator_loads
+
+    try:
+        mediator = mediator_loads(marina[key])
+    except KeyError:
+        # removed while we were checking
+        return None
+    except Exception as exc:
+        return Problem("undeserializable", marina, key, repr(exc))
+    try:
+        with mediator.open_text() as ifh:
+            try:
+                preamble = split_preamble(ifh)
+            except Exception as exc:
+                return Problem("bad-preamble", marina, key, f"{mediator!r}: {exc!r}")
+    except (FileNotFoundError, KeyError) as exc:
+        # missing file, archive member or bundle section
+        return Problem("dangling", marina, key, f"{mediator!r}: {exc!r}")
+    except Exception as exc:
+        # possibly transient, such as PermissionError
+        return Problem("unreadable", marina, key, f"{mediator!r}: {exc!r}")
+    if preamble["address"] != key:
+        return Problem(
+            "address-mismatch",
+            marina,
+            key,
+            f"{mediator!r}: preamble address is {preamble['address']!r}",
+        )
+    return None
@@ -1,4 +1,7 @@
-from ...database import FileInOsMediator, mediator_dumps
+from ...database import mediator_dumps
+from ...database.bundle import BundleMemberMediator, is_bundle, sections
+from ...database.compression import compress_file, file_mediator
+from ...database.resource import ResourceMediator, parse_spec
 from ..util import format_desc, top_package
 from ...util.split_preamble import split_preamble
 import argparse
@@ -16,7 +19,7 @@ def main(command, args):
 
     .. code-block:: text
 
-        usage: python -m configoose moor [-h] [-a ADDRESS] MARINA CONFIGFILE
+        usage: python -m configoose moor [-h] [-a ADDRESS] [-c {gzip,lzma}] [-r] MARINA CONFIGFILE
 
         Moor a configuration file in a marina.
 
@@ -29,7 +32,17 @@ def main(command, args):
         -a ADDRESS, --address ADDRESS
                                 abstract address if needed. If not given, the address is extracted
                                 from the configuration file
+        -c {gzip,lzma}, --compress {gzip,lzma}
+                                compress the configuration file and moor the compressed file,
+                                written next to it with a suffix .gz or .xz
+        -r, --resource        CONFIGFILE is a package resource given as PACKAGE:RESOURCE
 
+    Configuration files having a suffix .gz or .xz are moored as compressed files.
+    If CONFIGFILE is a bundle (see :mod:`configoose.database.bundle`), all its
+    sections are moored, each at the address found in its preamble. With
+    the option -r, the configuration is read through :mod:`importlib.resources`
+    and moored as a :class:`ResourceMediator`, which also works for packages
+    imported from zip files.
     """
     parser = argparse.ArgumentParser(
         prog=f"python -m {top_package.__name__} {command}",
@@ -56,27 +69,67 @@ def main(command, args):
         required=False,
         help="abstract address if needed. If not given, the address is extracted from the configuration file",
     )
+    parser.add_argument(
+        "-c",
+        "--compress",
+        dest="compress",
+        choices=["gzip", "lzma"],
+        help=(
+            "compress the configuration file and moor the compressed file,"
+            " written next to it with a suffix .gz or .xz"
+        ),
+    )
+    parser.add_argument(
+        "-r",
+        "--resource",
+        dest="resource",
+        action="store_true",
+        help="CONFIGFILE is a package resource given as PACKAGE:RESOURCE",
+    )
     args = parser.parse_args(args)
     # find first marina with the given tag, err if no marina.
-    for marina in top_package.root_db.path:
-        if args.tag in marina.tags:
-            break
-    else:
+    if not (marinas := top_package.root_db.marinas_with_tag(args.tag)):
         raise TagNotFoundError("No marina with tag", args.tag)
+    marina = marinas[0]
+
+    # create mediator for given file or extract it from db
+    if args.resource:
+        if args.compress:
+            parser.error("option -c is not supported for resources")
+        mediator = ResourceMediator(*parse_spec(args.config))
+    elif args.config:
+        config = Path(args.config).resolve()
+        if is_bundle(config):
+            if args.address or args.compress:
+                parser.error("options -a and -c are not supported for bundles")
+            for address in sections(config):
+                moor(marina, address, BundleMemberMediator(config, address))
+            return
+        if args.compress:
+            config = compress_file(config, args.compress)
+        mediator = file_mediator(config)
+    else:
+        mediator = top_package.root_db[args.address]
 
     # if no address given, extract address from config file
     if not args.address:
-        with open(args.config) as ifh:
+        with mediator.open_text() as ifh:
             args.address = split_preamble(ifh)["address"]
 
-    # create mediator for given file or extract it from db
-    if args.config:
-        mediator = FileInOsMediator(Path(args.config).resolve())
-    else:
-        mediator = top_package.root_db[args.address]
+    moor(marina, args.address, mediator)
+
 
-    # remove address from root_db if it exists
-    del top_package.root_db[args.address]
+def moor(marina, address, mediator):
+    """Store a mediator in a marina and remove the address from the other
+    marinas of the root database
 
-    # store mediator in marina
-    marina[args.address] = mediator_dumps(mediator)
+    The mediator is stored first, so that nothing is removed if the marina
+    cannot store it. Read only marinas are left unchanged.
+    """
+    marina[address] = mediator_dumps(mediator)
+    for other in top_package.root_db.snapshot():
+        if other is not marina and not other.read_only:
+            try:
+                del other[address]
+            except KeyError:
+                pass
@@ -0,0 +1,229 @@
+from ..util import RecordingHandler, format_desc, top_package
+from ...configurator import AddedProtocol
+from ...database import Marina, mediator_loads
+from ...protocol import registry
+from ...util.split_preamble import split_preamble
+import argparse
+import json
+from pathlib import Path
+import time
+
+STAGES = ("init", "lookup", "deserialize", "open", "preamble", "exec")
+
+
+class ProtocolMismatch(ValueError):
+    pass
+
+
+def main(command, args):
+    """Profile the execution of a configuration
+
+    Implementation of the :code:`profile` subcommand which usage string is
+
+    .. code-block:: text
+
+        usage: python -m configoose profile [-h] [-p PROTOPATH] [-o PSTATS] [-j] ADDRESS
+
+        Run a configuration with a recording handler under cProfile and
+        tracemalloc, and report the time and peak memory of each stage.
+
+        positional arguments:
+        ADDRESS               abstract address of configuration
+
+        options:
+        -h, --help            show this help message and exit
+        -p PROTOPATH, --protocol PROTOPATH
+                                protocol to run, defaults to the protocol of the
+                                configuration's preamble
+        -o PSTATS, --output PSTATS
+                                dump the profile to this file in pstats format
+        -j, --json            print the report as JSON
+
+    The stages are the initialization of the root database (init), the
+    lookup of the address in the marinas of the root database (lookup),
+    the deserialization of the mediator (deserialize), the opening of the
+    configuration's text stream (open), the parsing of the preamble from
+    this stream (preamble) and the execution of the protocol, which reads
+    the rest of the stream (exec). The deserialize stage only appears for
+    marinas which store serialized mediators; the other marinas build the
+    mediator during the lookup. The time of the exec stage is further split
+    between configoose's code, the code of the configuration file itself
+    and other code such as the standard library.
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"python -m {top_package.__name__} {command}",
+        description=format_desc(
+            """\
+            >Run a configuration with a recording handler under cProfile and
+            tracemalloc, and report the time and peak memory of each stage."""
+        ),
+    )
+    parser.add_argument(
+        "address", help="abstract address of configuration", metavar="ADDRESS"
+    )
+    parser.add_argument(
+        "-p",
+        "--protocol",
+        dest="protocol",
+        metavar="PROTOPATH",
+        help="protocol to run, defaults to the protocol of the configuration's preamble",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        metavar="PSTATS",
+        help="dump the profile to this file in pstats format",
+    )
+    parser.add_argument(
+        "-j",
+        "--json",
+        dest="json",
+        action="store_true",
+        help="print the report as JSON",
+    )
+    args = parser.parse_args(args)
+
+    try:
+        report, stats = profile(args.address, args.protocol)
+    except ProtocolMismatch as exc:
+        parser.error(
+            f"the protocol of {args.address!r} is {exc.args[1]!r},"
+            f" not {args.protocol!r}"
+        )
+    if args.output:
+        stats.dump_stats(args.output)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+def profile(address, protopath=None):
+    """Run a configuration under cProfile and tracemalloc
+
+    :param address: the abstract address of the configuration
+    :param protopath: the protocol to run, defaults to the preamble's protocol
+    :return: a pair `(report, stats)` where report is a JSON serializable
+        dict and stats a :class:`pstats.Stats` instance for the whole run
+    :raises ProtocolMismatch: if `protopath` is not the preamble's protocol
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    profiles = {}
+    report = {"address": address, "stages": {}}
+
+    def stage(name, func):
+        prof = profiles[name] = cProfile.Profile()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        prof.enable()
+        try:
+            return func()
+        finally:
+            prof.disable()
+            elapsed = time.perf_counter() - start
+            report["stages"][name] = {
+                "time": elapsed,
+                "peak_memory": tracemalloc.get_traced_memory()[1] - base,
+            }
+
+    tracemalloc.start()
+    try:
+        db = stage("init", top_package.init_root_db)
+        marina, found = stage("lookup", lambda: lookup(db, address))
+        if isinstance(found, str):
+            mediator = stage("deserialize", lambda: mediator_loads(found))
+        else:
+            mediator = found
+        with stage("open", mediator.open_text) as stream:
+            preamble = stage("preamble", lambda: split_preamble(stream))
+            protopath = registry.canonical(protopath or preamble["protopath"])
+            if protopath != registry.canonical(preamble["protopath"]):
+                raise ProtocolMismatch(
+                    "Configuration protocol is", preamble["protopath"]
+                )
+            handler = RecordingHandler()
+            ap = AddedProtocol((), {"handler": handler})
+
+            def execute():
+                registry.instance(protopath).run_stream(
+                    ap, preamble, stream, mediator
+                )
+
+            stage("exec", execute)
+    finally:
+        tracemalloc.stop()
+
+    report["marina"] = repr(marina)
+    report["mediator"] = repr(mediator)
+    report["protopath"] = protopath
+    report["handler_calls"] = len(handler.calls)
+    report["exec"] = split_time(
+        pstats.Stats(profiles["exec"]), mediator.system_path()
+    )
+    report["total"] = sum(v["time"] for v in report["stages"].values())
+    stats = pstats.Stats(*(profiles[name] for name in STAGES if name in profiles))
+    return report, stats
+
+
+def lookup(db, address):
+    """Find an address in the marinas of a database like :class:`Db` does
+
+    :return: a pair `(marina, value)` where value is the serialized
+        mediator if the marina uses the default :meth:`Marina.get_mediator`,
+        else the mediator built by the marina
+    :raises KeyError: if the address is not found
+    """
+    for marina in db.snapshot():
+        if not marina.may_contain(address):
+            continue
+        try:
+            if type(marina).get_mediator is Marina.get_mediator:
+                return marina, marina[address]
+            return marina, marina.get_mediator(address)
+        except KeyError:
+            pass
+    raise KeyError(address)
+
+
+def split_time(stats, system_path=None):
+    """Split the internal time of a profile by origin of the code
+
+    :return: a dict with keys `"configoose"` for the code of this package,
+        `"config"` for the code of the configuration file and `"other"`
+    """
+    package_dir = str(Path(top_package.__file__).parent)
+    config_files = {"<string>", str(system_path)}
+    res = {"configoose": 0.0, "config": 0.0, "other": 0.0}
+    for (filename, lineno, funcname), (cc, nc, tt, ct, callers) in stats.stats.items():
+        if filename.startswith(package_dir):
+            res["configoose"] += tt
+        elif filename in config_files:
+            res["config"] += tt
+        else:
+            res["other"] += tt
+    return res
+
+
+def print_report(report):
+    """Print a report returned by :func:`profile` in a human readable form"""
+    print(f"address:  {report['address']}")
+    print(f"marina:   {report['marina']}")
+    print(f"mediator: {report['mediator']}")
+    print(f"protocol: {report['protopath']}")
+    print(f"handler calls: {report['handler_calls']}")
+    print()
+    print(f"{'stage':<16}{'time (ms)':>12}{'peak memory (KiB)':>20}")
+    for name, value in report["stages"].items():
+        print(
+            f"{name:<16}{value['time'] * 1000:>12.3f}"
+            f"{value['peak_memory'] / 1024:>20.1f}"
+        )
+        if name == "exec":
+            for origin, t in report["exec"].items():
+                print(f"  {origin:<14}{t * 1000:>12.3f}")
+    print(f"{'total':<16}{report['total'] * 1000:>12.3f}")
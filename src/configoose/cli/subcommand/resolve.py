@@ -0,0 +1,160 @@
+from ..util import format_desc, top_package
+from ...util.split_preamble import split_preamble
+import argparse
+from collections import OrderedDict
+from contextlib import nullcontext
+import json
+import queue
+import sys
+import threading
+
+# maximum number of recent addresses whose lookups are shared
+CACHE_SIZE = 4096
+
+
+def main(command, args):
+    """Resolve many addresses as JSON lines
+
+    Implementation of the :code:`resolve` subcommand which usage string is
+
+    .. code-block:: text
+
+        usage: python -m configoose resolve [-h] [-i INFILE] [-p] [-j JOBS]
+
+        Read addresses, one per line, and print one JSON object per line
+        for each of them.
+
+        options:
+        -h, --help            show this help message and exit
+        -i INFILE, --input INFILE
+                                file containing the addresses, defaults to
+                                standard input
+        -p, --preamble        include the configuration's preamble
+        -j JOBS, --jobs JOBS  number of concurrent lookups, defaults to 16
+
+    Each output line is a JSON object with the keys `address`, `mediator`
+    (the mediator's repr), `system_path` (a string or null) and `tags`
+    (the tags of the marina where the address was found), and `preamble`
+    if requested. For an address that cannot be resolved, the object
+    has the keys `address` and `error`. Output lines are in the order of
+    the input lines, and are flushed as soon as they are available.
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"python -m {top_package.__name__} {command}",
+        description=format_desc(
+            """\
+            >Read addresses, one per line, and print one JSON object per line
+            for each of them."""
+        ),
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        dest="input",
+        metavar="INFILE",
+        help="file containing the addresses, defaults to standard input",
+    )
+    parser.add_argument(
+        "-p",
+        "--preamble",
+        dest="preamble",
+        action="store_true",
+        help="include the configuration's preamble",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=16,
+        metavar="JOBS",
+        help="number of concurrent lookups, defaults to 16",
+    )
+    args = parser.parse_args(args)
+
+    if args.input and args.input != "-":
+        ifh = open(args.input)
+    else:
+        # don't close sys.stdin
+        ifh = nullcontext(sys.stdin)
+    with ifh as lines:
+        addresses = (line.strip() for line in lines)
+        addresses = (a for a in addresses if a)
+        for res in resolve(
+            top_package.root_db, addresses, preamble=args.preamble, jobs=args.jobs
+        ):
+            sys.stdout.write(json.dumps(res) + "\n")
+            sys.stdout.flush()
+
+
+def resolve(db, addresses, preamble=False, jobs=16):
+    """Resolve a stream of addresses
+
+    :param db: a :class:`Db` instance
+    :param addresses: an iterable of addresses
+    :param preamble: if set, include the preamble of the configurations
+    :param jobs: number of concurrent lookups
+    :return: an iterator of JSON serializable dicts, one per address, in order
+
+    The addresses are read in a separate thread, which submits the lookups
+    to a thread pool with at most a few times `jobs` lookups in flight, so
+    that each result is yielded as soon as it and the previous ones are
+    available, even if reading the next address blocks. An address repeated
+    among the last :data:`CACHE_SIZE` distinct addresses is not looked up
+    again.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    pending = queue.Queue(4 * jobs)
+    done = object()
+
+    def read(executor):
+        # submit the lookups in input order, then put `done`
+        cache = OrderedDict()  # address -> future, in LRU order
+        try:
+            for address in addresses:
+                if (future := cache.get(address)) is None:
+                    future = cache[address] = executor.submit(
+                        resolve_one, db, address, preamble
+                    )
+                    if len(cache) > CACHE_SIZE:
+                        cache.popitem(last=False)
+                else:
+                    cache.move_to_end(address)
+                pending.put(future)
+        except BaseException as exc:
+            pending.put(exc)
+        else:
+            pending.put(done)
+
+    with ThreadPoolExecutor(jobs) as executor:
+        reader = threading.Thread(target=read, args=(executor,), daemon=True)
+        reader.start()
+        while (item := pending.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield item.result()
+
+
+def resolve_one(db, address, preamble=False):
+    """Resolve a single address, see :func:`resolve`"""
+    try:
+        marina, mediator = db.locate(address)
+    except KeyError:
+        return {"address": address, "error": "missing"}
+    except Exception as exc:
+        return {"address": address, "error": repr(exc)}
+    p = mediator.system_path()
+    res = {
+        "address": address,
+        "mediator": repr(mediator),
+        "system_path": None if p is None else str(p),
+        "tags": sorted(marina.tags),
+    }
+    if preamble:
+        try:
+            with mediator.open_text() as ifh:
+                res["preamble"] = dict(split_preamble(ifh))
+        except Exception as exc:
+            res["error"] = repr(exc)
+    return res
@@ -0,0 +1,77 @@
+from ..util import format_desc, top_package
+import argparse
+import errno
+import os
+import signal
+import sys
+
+
+def main(command, args):
+    """Run a resolver daemon on a Unix socket
+
+    Implementation of the :code:`serve` subcommand which usage string is
+
+    .. code-block:: text
+
+        usage: python -m configoose serve [-h] [-s SOCKET] [-i SECONDS]
+
+        Serve lookups in the root database on a Unix domain socket.
+
+        options:
+        -h, --help            show this help message and exit
+        -s SOCKET, --socket SOCKET
+                                path of the socket, defaults to
+                                $XDG_RUNTIME_DIR/configoose.sock
+        -i SECONDS, --interval SECONDS
+                                seconds between two checks of the marinas for
+                                changes, defaults to 1
+
+    Client processes use the daemon when the environment variable
+    ``CONFIGOOSE_RESOLVER`` is set to the socket's path. The daemon must be
+    restarted after a change in the ``configooseconf`` modules.
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"python -m {top_package.__name__} {command}",
+        description=format_desc(
+            """\
+            >Serve lookups in the root database on a Unix domain socket."""
+        ),
+    )
+    parser.add_argument(
+        "-s",
+        "--socket",
+        dest="socket",
+        metavar="SOCKET",
+        help="path of the socket, defaults to $XDG_RUNTIME_DIR/configoose.sock",
+    )
+    parser.add_argument(
+        "-i",
+        "--interval",
+        dest="interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="seconds between two checks of the marinas for changes, defaults to 1",
+    )
+    args = parser.parse_args(args)
+
+    # the daemon itself must walk the marinas
+    os.environ.pop("CONFIGOOSE_RESOLVER", None)
+    from ...database.resolver import serve
+
+    # exit cleanly on SIGTERM, removing the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    def ready(server):
+        print(f"Serving on {server.server_address}", file=sys.stderr, flush=True)
+
+    try:
+        serve(
+            top_package.root_db, args.socket, interval=args.interval, ready=ready
+        )
+    except KeyboardInterrupt:
+        pass
+    except OSError as exc:
+        if exc.errno not in (errno.EADDRINUSE, errno.EACCES):
+            raise
+        parser.error(f"{exc.strerror} {exc.filename}")
@@ -0,0 +1,62 @@
+from ..util import format_desc, top_package
+import argparse
+from pathlib import Path
+
+
+def main(command, args):
+    """Synchronize a local mirror of a marina
+
+    Implementation of the :code:`sync` subcommand which usage string is
+
+    .. code-block:: text
+
+        usage: python -m configoose sync [-h] [-q] SOURCE CACHE
+
+        Mirror a marina directory and the configuration files of its entries
+        into a local directory, copying only what changed.
+
+        positional arguments:
+        SOURCE         directory of the source marina
+        CACHE          directory of the mirror
+
+        options:
+        -h, --help     show this help message and exit
+        -q, --quiet    don't print the summary
+
+    See :mod:`configoose.database.mirror` for the layout of the mirror
+    and how to use it in place of the source marina. This command is
+    typically run periodically or after mooring files in the source marina.
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"python -m {top_package.__name__} {command}",
+        description=format_desc(
+            """\
+            >Mirror a marina directory and the configuration files of its entries
+            into a local directory, copying only what changed."""
+        ),
+    )
+    parser.add_argument(
+        "source", metavar="SOURCE", help="directory of the source marina"
+    )
+    parser.add_argument("cache", metavar="CACHE", help="directory of the mirror")
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        dest="quiet",
+        action="store_true",
+        help="don't print the summary",
+    )
+    args = parser.parse_args(args)
+
+    from ...database import MarinaDirInOs
+    from ...database.mirror import sync
+
+    source = Path(args.source).resolve()
+    if not source.is_dir():
+        parser.error(f"no such directory: {args.source}")
+    res = sync(MarinaDirInOs(source), args.cache)
+    if not args.quiet:
+        print(
+            f"{res.added} added, {res.updated} updated, {res.removed} removed,"
+            f" {res.unchanged} unchanged entries, {res.copied} files copied"
+        )
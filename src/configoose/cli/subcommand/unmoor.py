@@ -1,4 +1,7 @@
 from ..util import format_desc, top_package
+from ...database.bundle import is_bundle, sections
+from ...database.compression import file_mediator
+from ...database.resource import ResourceMediator, parse_spec
 from ...util.split_preamble import split_preamble
 import argparse
 from pathlib import Path
@@ -12,7 +15,7 @@ def main(command, args):
 
     .. code-block:: text
 
-        usage: python -m configoose unmoor [-h] [-a ADDRESS] [CONFIGFILE]
+        usage: python -m configoose unmoor [-h] [-a ADDRESS] [-r] [CONFIGFILE]
 
         Unmoor a configuration file.
 
@@ -24,7 +27,9 @@ def main(command, args):
         -a ADDRESS, --address ADDRESS
                                 abstract address if needed. If not given, the address is
                                 exctracted from the configuration file
+        -r, --resource        CONFIGFILE is a package resource given as PACKAGE:RESOURCE
 
+    If CONFIGFILE is a bundle, all its sections are unmoored.
     """
     parser = argparse.ArgumentParser(
         prog=f"python -m {top_package.__name__} {command}",
@@ -47,11 +52,27 @@ def main(command, args):
         required=False,
         help="abstract address if needed. If not given, the address is exctracted from the configuration file",
     )
+    parser.add_argument(
+        "-r",
+        "--resource",
+        dest="resource",
+        action="store_true",
+        help="CONFIGFILE is a package resource given as PACKAGE:RESOURCE",
+    )
     args = parser.parse_args(args)
 
+    if not args.address and not args.resource and is_bundle(args.config):
+        for address in sections(args.config):
+            del top_package.root_db[address]
+        return
+
     # if no address given, extract address from config file
     if not args.address:
-        with open(args.config) as ifh:
+        if args.resource:
+            mediator = ResourceMediator(*parse_spec(args.config))
+        else:
+            mediator = file_mediator(args.config)
+        with mediator.open_text() as ifh:
             args.address = split_preamble(ifh)["address"]
 
     # remove address from root_db if it exists
@@ -79,3 +79,28 @@ def edit_file(filename):
         sp.Popen(["open", filename], stdout=sp.DEVNULL, stderr=sp.DEVNULL)
     else:
         pass
+
+
+class RecordingHandler:
+    """Handler accepting any call, used to dry-run configurations
+
+    An instance can be registered as the handler of any protocol. Calling
+    it, or calling any of its attributes, records the dotted name of the
+    call in the list :attr:`calls` and returns a handler sharing that list.
+    """
+
+    def __init__(self, calls=None, name="handler"):
+        self.calls = [] if calls is None else calls
+        self._name = name
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._name}>"
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append(self._name)
+        return self
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return type(self)(self.calls, f"{self._name}.{attr}")
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+import hashlib
 import io
-from .util.digattr import dig
+import sys
+from .protocol import registry
 from .util.split_preamble import split_preamble
 
 
@@ -17,7 +19,8 @@ class AbstractConfigurator(ABC):
 
     def __init__(self, address):
         self._protocols = {}
-        self.address = address
+        self._applied = None
+        self.address = sys.intern(address)
 
     @property
     @abstractmethod
@@ -28,7 +31,8 @@ class AbstractConfigurator(ABC):
     def add_protocol(self, protopath, *args, **kwargs):
         """Declare a configuration protocol honored by the client program
 
-        :param protopath: full dotted path of a :class:`Protocol` class in Python's module system
+        :param protopath: full dotted path of a :class:`Protocol` class in Python's module system,
+            or an alias registered in :mod:`configoose.protocol.registry`
         :type protopath: str
         :param args: additional arguments stored in the resulting object
         :param kwargs: additional keyword arguments stored in the resulting object
@@ -36,7 +40,7 @@ class AbstractConfigurator(ABC):
         :rtype: AddedProtocol
         """
         ap = AddedProtocol(args, kwargs)
-        self._protocols[protopath] = ap
+        self._protocols[registry.canonical(protopath)] = ap
         return ap
 
     def run(self, missing_ok=False):
@@ -53,24 +57,185 @@ class AbstractConfigurator(ABC):
         and calls the protocol's `run()` method, passing it the :class:`AddedProtocol`
         instance, the preamble and the remaining text of the configuration file.
         """
+        if mediator := self._lookup(missing_ok):
+            with mediator.open_text() as stream:
+                preamble = split_preamble(stream)
+                self._apply(mediator, preamble, stream, missing_ok)
+
+    def run_if_changed(self, missing_ok=False, check="stat"):
+        """Execute the configuration action unless the configuration
+        did not change since it was last applied by this method
+
+        :param missing_ok: same as in :meth:`run`
+        :type missing_ok: bool
+        :param check: either `"stat"` or `"hash"`. Defaults to `"stat"`
+        :type check: str
+        :return: True if the configuration was applied, else False
+        :rtype: bool
+
+        With `check="stat"`, the configuration is considered unchanged if
+        the mediator's :meth:`Mediator.stat` stamp (for example the file's
+        modification time and size) is the same as when it was last applied.
+        Nothing is read in that case. With `check="hash"`, or if the
+        mediator provides no stamp, the content is read and its digest is
+        compared to the digest of the content last applied. In both cases
+        an unchanged configuration is neither parsed nor executed.
+        """
+        if check not in ("stat", "hash"):
+            raise ValueError("Expected 'stat' or 'hash', got", check)
+        if not (mediator := self._lookup(missing_ok)):
+            self._applied = None
+            return False
+        stamp = mediator.stat() if check == "stat" else None
+        if stamp is not None and self._applied and self._applied[0] == stamp:
+            return False
+        data = mediator.read_bytes()
+        digest = hashlib.sha256(data).digest()
+        if self._applied and self._applied[1] == digest:
+            self._applied = (stamp, digest)
+            return False
+        # decode as run() does, Mediator.open_text() defaults to utf8
+        with io.TextIOWrapper(io.BytesIO(data), encoding="utf8") as stream:
+            preamble = split_preamble(stream)
+            applied = self._apply(mediator, preamble, stream, missing_ok)
+        self._applied = (stamp, digest) if applied else None
+        return applied
+
+    def _lookup(self, missing_ok):
+        # return the mediator found for our address, None if missing
         try:
-            mediator = self.database[self.address]
+            return self.database[self.address]
         except KeyError:
             if missing_ok:
-                return
+                return None
             else:
                 raise Error("Missing configuration for address", self.address)
-        f = io.StringIO(mediator.read_text())
-        preamble = split_preamble(f)
-        text = f.read()
+
+    def _apply(self, mediator, preamble, stream, missing_ok):
+        # run the protocol on the configuration stream positioned after
+        # the preamble, return False if the protocol was not added and
+        # missing_ok is set
+        protopath = registry.canonical(preamble["protopath"])
         try:
-            ap = self._protocols[preamble["protopath"]]
+            ap = self._protocols[protopath]
         except KeyError:
             if missing_ok:
-                return
+                return False
             else:
                 raise
-        dig(*preamble["protopath"].split("."))().run(ap, preamble, text, mediator)
+        registry.instance(protopath).run_stream(ap, preamble, stream, mediator)
+        return True
+
+
+def run_all(configurators, missing_ok=False, max_workers=None):
+    """Run several configurators in dependency order, in parallel when possible
+
+    :param configurators: an iterable of :class:`AbstractConfigurator` instances
+        with distinct addresses
+    :param missing_ok: same as in :meth:`AbstractConfigurator.run`
+    :type missing_ok: bool
+    :param max_workers: maximum number of threads, see
+        :class:`concurrent.futures.ThreadPoolExecutor`
+    :raises Error: if the dependencies contain a cycle
+
+    Configuration preambles can declare the addresses of the configurations
+    they depend on, in a `"requires"` list
+
+    .. code-block:: text
+
+        {
+            "address": "spam-address",
+            "protopath": "configoose.protocol.methodic.Protocol",
+            "requires": ["eggs-address", "ham-address"],
+        }
+
+    The configurations are first looked up and their preambles read in
+    parallel. Each of them is then reopened and executed once all the
+    configurations that it requires have been executed, so that at most
+    `max_workers` configurations are open at the same time. Required
+    addresses that don't belong to the configurators passed to this
+    function are ignored. If a configuration fails, no other configuration
+    is started, whether it depends on the failed one or not, and the
+    exception is raised once the configurations already running are
+    finished.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    cfgs = {}
+    for cfg in configurators:
+        if cfg.address in cfgs:
+            raise ValueError("Duplicate address", cfg.address)
+        cfgs[cfg.address] = cfg
+
+    def prepare(cfg):
+        if mediator := cfg._lookup(missing_ok):
+            with mediator.open_text() as stream:
+                return mediator, split_preamble(stream)
+
+    def apply(cfg, mediator, preamble):
+        with mediator.open_text() as stream:
+            preamble = split_preamble(stream)
+            cfg._apply(mediator, preamble, stream, missing_ok)
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = {a: executor.submit(prepare, cfg) for a, cfg in cfgs.items()}
+        prepared = {}
+        errors = []
+        for address, future in futures.items():
+            if exc := future.exception():
+                errors.append(exc)
+            elif p := future.result():
+                prepared[address] = p
+        if errors:
+            raise errors[0]
+        _run_graph(executor, cfgs, prepared, apply)
+
+
+def _run_graph(executor, cfgs, prepared, apply):
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    # build the dependency graph between the found configurations
+    waiting = {}  # address -> number of unfinished requirements
+    dependents = {a: [] for a in prepared}
+    for address, (mediator, preamble) in prepared.items():
+        requires = set(preamble.get("requires", ())) & prepared.keys()
+        requires.discard(address)
+        waiting[address] = len(requires)
+        for req in requires:
+            dependents[req].append(address)
+    _check_acyclic(waiting, dependents)
+
+    def submit(address):
+        return executor.submit(apply, cfgs[address], *prepared[address])
+
+    running = {submit(a): a for a, n in waiting.items() if not n}
+    error = None
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            address = running.pop(future)
+            if exc := future.exception():
+                error = error or exc
+                continue
+            for dep in dependents[address]:
+                waiting[dep] -= 1
+                if not waiting[dep] and not error:
+                    running[submit(dep)] = dep
+    if error:
+        raise error
+
+
+def _check_acyclic(waiting, dependents):
+    # Kahn's algorithm on a copy of the graph
+    waiting = dict(waiting)
+    ready = [a for a, n in waiting.items() if not n]
+    while ready:
+        for dep in dependents[ready.pop()]:
+            waiting[dep] -= 1
+            if not waiting[dep]:
+                ready.append(dep)
+    if cycle := sorted(a for a, n in waiting.items() if n):
+        raise Error("Dependency cycle between addresses", cycle)
 
 
 class AddedProtocol:
@@ -80,6 +245,8 @@ class AddedProtocol:
     :param kwargs: additional dict of arguments
     """
 
+    __slots__ = ("args", "kwargs")
+
     def __init__(self, args, kwargs):
         self.args = args
         self.kwargs = kwargs
@@ -1,11 +1,18 @@
+from ..util.atomic import write_atomic
+from ..util.bloom import BloomFilter
 from abc import abstractmethod, ABC
 from collections import deque
-from collections.abc import Mapping, MutableMapping
+from collections.abc import Mapping, MutableMapping, MutableSequence
 from importlib import import_module
+import io
+from itertools import count
 import marshmallow as ms
 import os
 from pathlib import Path
 from reprlib import recursive_repr as _recursive_repr
+import sys
+import threading
+import time
 
 
 # mediators are serializable with MediatorSchema
@@ -24,8 +31,13 @@ class Mediator(ABC):
 
     Subclasses of :class:`Mediator` implement concrete
     access to configuration content in specific storage.
+    As large numbers of mediators may be kept in memory, the
+    base class defines empty `__slots__` so that subclasses
+    can avoid a per-instance `__dict__`.
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def read_bytes(self) -> bytes:
         """Read configuration content as bytes"""
@@ -40,6 +52,17 @@ class Mediator(ABC):
         """
         return self.read_bytes().decode(encoding)
 
+    def open_text(self, encoding: str = "utf8"):
+        """Return a text stream reading the configuration content.
+        The default implementation wraps the result of :func:`read_text`
+        in a :class:`io.StringIO`. Subclasses can override it to read
+        the content incrementally.
+
+        :param encoding: unicode encoding, defaults to utf8
+        :type encoding: str
+        """
+        return io.StringIO(self.read_text(encoding))
+
     @classmethod
     @abstractmethod
     def schema_type(cls):
@@ -55,6 +78,15 @@ class Mediator(ABC):
     def system_path(self):
         """Return a system path of this mediator if available, else None"""
 
+    def stat(self):
+        """Return a cheap stamp of the configuration content, or None
+
+        The stamp is a hashable value that changes when the content
+        changes, obtained without reading the content, for example the
+        modification time and size of a file. The default implementation
+        returns None, meaning that no such stamp is available.
+        """
+
 
 class Db(Mapping[str, Mediator]):
     """The :class:`Db` class is the type of :mod:`configoose`'s
@@ -64,60 +96,149 @@ class Db(Mapping[str, Mediator]):
     It is built upon a sequence of marinas, creating a
     single view of this sequence.
 
-    The underlying marinas are stored in a list. That list
-    is public and can be accessed or updated using the
-    *path* attribute. There is no other state.
+    The underlying marinas are stored in an immutable tuple
+    which is replaced on each update (copy on write). The
+    sequence is public and can be accessed or updated using the
+    *path* attribute, a :class:`MarinaPath` instance which
+    supports the list operations. There is no other state.
 
     Lookups search the underlying marinas successively
-    until a key is found. This is conceptually similar
+    until a key is found, skipping the marinas which
+    :meth:`Marina.may_contain` method tells that they
+    don't contain the key. This is conceptually similar
     to a collections.ChainMap except that the values
     found are deserialized before return: lookups return
     Mediator instances instead of serialized mediators
     which are stored into marinas.
+
+    Lookups don't take any lock: each of them iterates over
+    the snapshot of the marinas that was current when it
+    started, thus a :class:`Db` can be used by several threads
+    while marinas are added or removed.
     """
 
     # Implementation largely inspired from ChainMap.
     def __init__(self, *marinas):
-        self.path = list(marinas)
+        self._lock = threading.Lock()
+        self._marinas = tuple(marinas)
+        self._tag_index = None
+
+    @property
+    def path(self):
+        """The sequence of marinas of this database"""
+        return MarinaPath(self)
+
+    @path.setter
+    def path(self, marinas):
+        marinas = tuple(marinas)
+        with self._lock:
+            self._marinas = marinas
+
+    def snapshot(self):
+        """Return the current marinas as a tuple"""
+        return self._marinas
+
+    def _tags(self):
+        # return the index tag -> tuple of marinas, rebuilt when
+        # the tuple of marinas is replaced
+        marinas = self._marinas
+        index = self._tag_index
+        if index is None or index[0] is not marinas:
+            d = {}
+            for marina in marinas:
+                for tag in marina.tags:
+                    d.setdefault(tag, []).append(marina)
+            index = self._tag_index = (marinas, {t: tuple(v) for t, v in d.items()})
+        return index[1]
+
+    def marinas_with_tag(self, tag):
+        """Return the tuple of the marinas having a given tag, in order
+
+        :param tag: a marina tag
+        :type tag: str
+        """
+        return self._tags().get(tag, ())
+
+    def view(self, tags=None, exclude=(), max_age=None):
+        """Return a read only sub-database restricted to some marinas
+
+        :param tags: if not None, a tag or an iterable of tags; select
+            only the marinas having at least one of these tags
+        :param exclude: a tag or an iterable of tags; exclude the
+            marinas having one of these tags
+        :param max_age: see :class:`DbView`
+        :return: a :class:`DbView` instance
+
+        The view follows the marinas added to or removed from this
+        database.
+        """
+        return DbView(self, tags=tags, exclude=exclude, max_age=max_age)
+
+    def _update(self, func):
+        # apply func to a copy of the marinas list and publish the result
+        with self._lock:
+            marinas = list(self._marinas)
+            result = func(marinas)
+            self._marinas = tuple(marinas)
+        return result
 
     def __missing__(self, key):
         raise KeyError(key)
 
     def __getitem__(self, key):
-        for marina in self.path:
+        for marina in self._marinas:
+            if not marina.may_contain(key):
+                continue
             try:
-                s = marina[key]  # can't use 'key in mapping' with defaultdict
+                # can't use 'key in mapping' with defaultdict
+                return marina.get_mediator(key)
             except KeyError:
                 pass
-            else:
-                return mediator_loads(s)
         return self.__missing__(key)  # support subclasses that define __missing__
 
+    def locate(self, key):
+        """Return the marina where a key is found and the mediator
+
+        :param key: a configuration address
+        :return: a pair `(marina, mediator)`
+        :raises KeyError: if the key is not found in any marina
+        """
+        for marina in self._marinas:
+            if not marina.may_contain(key):
+                continue
+            try:
+                return marina.locate(key)
+            except KeyError:
+                pass
+        raise KeyError(key)
+
     def get(self, key, default=None):
         return self[key] if key in self else default
 
     def __len__(self):
-        return len(set().union(*self.path))
+        return len(set().union(*self._marinas))
 
     def __iter__(self):
         d = {}
-        for marina in reversed(self.path):
+        for marina in reversed(self._marinas):
             d.update(dict.fromkeys(marina))
         return iter(d)
 
     def __contains__(self, key):
-        return any(key in m for m in self.path)
+        return any(m.may_contain(key) and key in m for m in self._marinas)
 
     def __bool__(self):
-        return any(self.path)
+        return any(self._marinas)
 
     @_recursive_repr()
     def __repr__(self):
-        return f'{self.__class__.__name__}({", ".join(map(repr, self.path))})'
+        return f'{self.__class__.__name__}({", ".join(map(repr, self._marinas))})'
 
     def __delitem__(self, key):
-        """Deletion (missing is OK)"""
-        for marina in self.path:
+        """Deletion (missing is OK), read only marinas are skipped"""
+        for marina in self._marinas:
+            if marina.read_only:
+                continue
             try:
                 del marina[key]
             except KeyError:
@@ -133,6 +254,192 @@ class Db(Mapping[str, Mediator]):
     __ror__ = None
 
 
+class DbView(Db):
+    """Read only view of the marinas of a :class:`Db` selected by their tags
+
+    :param db: the underlying database
+    :type db: Db
+    :param tags: if not None, a tag or an iterable of tags; select only
+        the marinas having at least one of these tags
+    :param exclude: a tag or an iterable of tags; exclude the marinas
+        having one of these tags
+    :param max_age: number of seconds after which cached lookups are
+        made again, or None to keep them until :meth:`invalidate` is called
+
+    Views are usually obtained with :meth:`Db.view`. The selected marinas
+    keep their order in the underlying database. They are selected
+    again through the database's tag index when its marinas change.
+
+    A view caches the results of its lookups, found or missing, so that
+    repeated lookups of an address neither probe the marinas nor
+    deserialize mediators. The cache is cleared when the selected marinas
+    change or when :meth:`invalidate` is called. Entries moored in the marinas by other
+    means are seen once the cache is cleared or the cached lookup expired.
+    """
+
+    def __init__(self, db, tags=None, exclude=(), max_age=None):
+        self._lock = threading.Lock()
+        self._tag_index = None
+        self._db = db
+        self.tags = None if tags is None else _tag_set(tags)
+        self.exclude = _tag_set(exclude)
+        self.max_age = max_age
+        self._selection = (None, ())
+        self._cache = {}
+
+    @property
+    def _marinas(self):
+        parent = self._db._marinas
+        source, selected = self._selection
+        if source is not parent:
+            selected = self._select(parent)
+            self._selection = (parent, selected)
+            self._cache = {}
+        return selected
+
+    def _select(self, marinas):
+        if self.tags is None:
+            candidates = set(marinas)
+        else:
+            index = self._db._tags()
+            candidates = set().union(*(index.get(t, ()) for t in self.tags))
+        for tag in self.exclude:
+            candidates.difference_update(self._db.marinas_with_tag(tag))
+        return tuple(m for m in marinas if m in candidates)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._db!r}, tags={self.tags!r}, exclude={self.exclude!r})"
+
+    @property
+    def path(self):
+        """The sequence of the selected marinas, read only"""
+        return MarinaPath(self)
+
+    @path.setter
+    def path(self, marinas):
+        raise TypeError(f"{type(self).__name__} is read only")
+
+    def _update(self, func):
+        raise TypeError(f"{type(self).__name__} is read only")
+
+    def invalidate(self):
+        """Clear the cache of lookups"""
+        self._cache = {}
+
+    def _resolve(self, key):
+        # return a cached pair (marina, mediator) or None
+        marinas = self._marinas  # clears the cache if the selection changed
+        cache = self._cache
+        if (entry := cache.get(key)) is not None:
+            stamp, res = entry
+            if self.max_age is None or time.monotonic() - stamp < self.max_age:
+                return res
+        try:
+            res = Db.locate(self, key)
+        except KeyError:
+            res = None
+        cache[key] = (time.monotonic(), res)
+        return res
+
+    def __getitem__(self, key):
+        if (res := self._resolve(key)) is None:
+            return self.__missing__(key)
+        return res[1]
+
+    def locate(self, key):
+        if (res := self._resolve(key)) is None:
+            raise KeyError(key)
+        return res
+
+    def __contains__(self, key):
+        return self._resolve(key) is not None
+
+    def __delitem__(self, key):
+        raise TypeError(f"{type(self).__name__} is read only")
+
+
+def _tag_set(tags):
+    # a single tag is a str, not the iterable of its characters
+    if isinstance(tags, str):
+        return frozenset((tags,))
+    return frozenset(tags)
+
+
+class MarinaPath(MutableSequence):
+    """Mutable sequence view of the marinas of a :class:`Db`
+
+    Every update replaces the database's tuple of marinas by
+    a new tuple, under the database's lock. Reads are made on
+    the current tuple without locking.
+
+    :param db: the underlying database
+    :type db: Db
+    """
+
+    __slots__ = ("_db",)
+
+    def __init__(self, db):
+        self._db = db
+
+    def __repr__(self):
+        return repr(list(self._db._marinas))
+
+    def __eq__(self, other):
+        if isinstance(other, MarinaPath):
+            other = other._db._marinas
+        return list(self._db._marinas) == list(other)
+
+    def __getitem__(self, index):
+        res = self._db._marinas[index]
+        return list(res) if isinstance(index, slice) else res
+
+    def __len__(self):
+        return len(self._db._marinas)
+
+    def __iter__(self):
+        return iter(self._db._marinas)
+
+    def __contains__(self, marina):
+        return marina in self._db._marinas
+
+    def __setitem__(self, index, value):
+        def func(marinas):
+            marinas[index] = value
+
+        self._db._update(func)
+
+    def __delitem__(self, index):
+        def func(marinas):
+            del marinas[index]
+
+        self._db._update(func)
+
+    def insert(self, index, value):
+        self._db._update(lambda marinas: marinas.insert(index, value))
+
+    def append(self, value):
+        # not inherited from MutableSequence, which reads len(self)
+        # outside of the lock
+        self._db._update(lambda marinas: marinas.append(value))
+
+    def extend(self, values):
+        values = list(values)
+        self._db._update(lambda marinas: marinas.extend(values))
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def pop(self, index=-1):
+        return self._db._update(lambda marinas: marinas.pop(index))
+
+    def remove(self, value):
+        self._db._update(lambda marinas: marinas.remove(value))
+
+    def clear(self):
+        self._db._update(lambda marinas: marinas.clear())
+
+
 class Marina(MutableMapping[str, str]):
     """This is the base class of marina objects. They
     are mutable mappings that map strings to strings.
@@ -140,12 +447,18 @@ class Marina(MutableMapping[str, str]):
     addresses to serialized :class:`Mediator` instances.
 
     :param tags: A set of strings used to identify marinas
+
+    Subclasses which entries cannot be set nor deleted set the class
+    attribute :attr:`read_only` to `True`. Deleting an address from a
+    :class:`Db` skips these marinas.
     """
 
     __eq__ = object.__eq__
     __ne__ = object.__ne__
     __hash__ = object.__hash__
 
+    read_only = False
+
     def __init__(self, tags=()):
         self.tags = set(tags)
 
@@ -169,6 +482,46 @@ class Marina(MutableMapping[str, str]):
         """
         return True
 
+    def get_mediator(self, key: str) -> Mediator:
+        """Return the deserialized mediator stored for a key.
+
+        :param key: a configuration address
+        :type key: str
+        :raises KeyError: if the key is not in the marina
+
+        :class:`Db` lookups use this method. The base class deserializes
+        `self[key]` but subclasses can build the mediator more directly.
+        """
+        return mediator_loads(self[key])
+
+    def locate(self, key: str):
+        """Return the marina where a key is found and its mediator.
+
+        :param key: a configuration address
+        :type key: str
+        :return: a pair `(marina, mediator)`
+        :raises KeyError: if the key is not in the marina
+
+        This is used by :meth:`Db.locate`. The base class returns `self`
+        as the marina, but marinas forwarding lookups to other marinas
+        can return a marina standing for the one where the key was found.
+        """
+        return self, self.get_mediator(key)
+
+    def may_contain(self, key: str) -> bool:
+        """Indicates whether a key may be present in this marina.
+
+        :param key: a configuration address
+        :type key: str
+        :return: `False` if the key is certainly absent, else `True`
+        :rtype: bool
+
+        This is a cheap test used by :class:`Db` lookups to skip marinas.
+        In the base class :class:`Marina`, this function always returns `True`
+        but concrete subclasses may use a summary of their keys.
+        """
+        return True
+
 
 class MarinaDict(dict, Marina):
     """Subclass of :class:`Marina` built on a dict instance. As these marinas
@@ -187,6 +540,20 @@ class MarinaDict(dict, Marina):
     __init__ = Marina.__init__
     __repr__ = Marina.__repr__
 
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, sys.intern(key), value)
+
+
+def _is_temporary(name):
+    # return true for the temporary files of configoose.util.atomic
+    return name.startswith(".") and name.endswith(".tmp")
+
+
+#: Coarsest modification time resolution of the supported file
+#: systems, in nanoseconds. Directories modified more recently than
+#: this don't get a saved Bloom filter.
+MTIME_GRANULARITY = 2 * 10**9
+
 
 class MarinaDirInOs(Marina):
     """Subclass of :class:`Marina` built on a file system directory.
@@ -200,38 +567,68 @@ class MarinaDirInOs(Marina):
     :param path: The path to the underlying directory
     :type path: `pathlib.Path`
     :param tags: A set of strings used to identify marinas
+    :param bloom: if set, keep a Bloom filter of the keys, see below
+    :type bloom: bool
+    :param interval: minimum number of seconds between two checks
+        that the Bloom filter is up to date
+    :type interval: float
+
+    With a Bloom filter, :meth:`may_contain` tells without any system
+    call that most absent keys are not in the marina, so that
+    :class:`Db` lookups skip this marina. The filter is saved in the
+    file ``.NAME.bloom`` next to the directory, stamped with the
+    directory's modification time, and rebuilt from the directory
+    listing when the directory changes. Keys added through this
+    instance are seen immediately, keys added by other processes are
+    seen after at most `interval` seconds. A filter is neither saved
+    nor trusted if the directory changed while it was built or less
+    than :data:`MTIME_GRANULARITY` before, because a key added in the
+    same modification time tick would be missing from it.
     """
 
-    def __init__(self, path: Path, tags=()):
+    def __init__(self, path: Path, tags=(), bloom=False, interval=1.0):
         if not isinstance(path, Path):
             raise TypeError("Expected pathlib.Path instance, got", repr(path))
         super().__init__(tags=tags)
         self.path = path
+        self.bloom = bloom
+        self.interval = interval
+        self._bloom_lock = threading.Lock()
+        self._filter = None
+        self._filter_stamp = None
+        self._filter_checked = 0.0
 
     def __repr__(self):
         return f"{type(self).__name__}({self.path!r}, tags={self.tags!r})"
 
     def __iter__(self):
-        return iter(next(os.walk(self.path))[2])
+        return iter(self.keys())
 
     def keys(self):
-        return next(os.walk(self.path))[2]
+        # the temporary files written by __setitem__ are not keys
+        return [
+            sys.intern(name)
+            for name in next(os.walk(self.path))[2]
+            if not _is_temporary(name)
+        ]
 
     def __len__(self):
         return ilen(iter(self))
 
     def __getitem__(self, key):
         self.is_valid_key(key, keyerror=True)
-        p = self.path / key
-        if p.is_file():
-            return p.read_text()
-        else:
-            raise KeyError(key)
+        try:
+            return (self.path / key).read_text()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            raise KeyError(key) from None
 
     def __setitem__(self, key, text):
-        del self[key]  # does not raise KeyError if missing key
-        p = self.path / key
-        p.write_text(text)
+        # write a temporary file and rename it, so that concurrent
+        # readers see either the old value or the new one.
+        self.is_valid_key(key, keyerror=True)
+        write_atomic(self.path / key, text.encode())
+        if (f := self._filter) is not None:
+            f.add(key)
 
     def __delitem__(self, key):
         self.is_valid_key(key, keyerror=True)
@@ -246,6 +643,71 @@ class MarinaDirInOs(Marina):
         else:
             return False
 
+    def may_contain(self, key):
+        if not self.bloom:
+            return True
+        f = self._filter
+        if f is None or time.monotonic() - self._filter_checked >= self.interval:
+            f = self._refresh_filter()
+        return f is None or key in f
+
+    @property
+    def bloom_path(self) -> Path:
+        """The path of the file where the Bloom filter is saved"""
+        return self.path.with_name(f".{self.path.name}.bloom")
+
+    def _refresh_filter(self):
+        # return a Bloom filter of the keys, or None if not available
+        with self._bloom_lock:
+            self._filter_checked = time.monotonic()
+            try:
+                stamp = os.stat(self.path).st_mtime_ns
+            except OSError:
+                self._filter = self._filter_stamp = None
+                return None
+            if self._filter is not None and stamp == self._filter_stamp:
+                return self._filter
+            f = None
+            try:
+                f, saved = BloomFilter.loads(self.bloom_path.read_bytes())
+                if saved != stamp:
+                    f = None
+            except (OSError, ValueError):
+                pass
+            if f is None:
+                f, stamp = self._build_filter()
+            # a None stamp forces a rebuild at the next check
+            self._filter, self._filter_stamp = f, stamp
+            return f
+
+    def build_filter(self):
+        """Build the Bloom filter from the directory listing and save it
+
+        :return: the new :class:`BloomFilter`
+
+        The filter is not saved if the directory may have changed while
+        it was built. Failing to save the filter is not an error.
+        """
+        return self._build_filter()[0]
+
+    def _build_filter(self):
+        # return the filter and the directory's modification time, or
+        # None instead of the time if the filter may miss a key
+        start = time.time_ns()
+        stamp = os.stat(self.path).st_mtime_ns
+        f = BloomFilter.for_keys(self.keys())
+        if (
+            os.stat(self.path).st_mtime_ns != stamp
+            or stamp > start - MTIME_GRANULARITY
+        ):
+            # racy: a key may have been added in the same time tick
+            return f, None
+        try:
+            write_atomic(self.bloom_path, f.dumps(stamp))
+        except OSError:
+            pass
+        return f, stamp
+
 
 def mediator_dumps(med: Mediator) -> str:
     """Serialize a mediator as a string"""
@@ -295,19 +757,36 @@ class FileInOsMediator(Mediator):
     stored as regular files in the file system.
 
     :param path: the path to the underlying file
+
+    The path is stored as a string, the :class:`pathlib.Path` instance
+    of the :attr:`path` attribute is created on first access.
     """
 
+    __slots__ = ("_path", "_pathobj")
+
     def __init__(self, path):
-        self.path = Path(path)
+        self._path = os.fspath(path)
+        self._pathobj = None
+
+    @property
+    def path(self) -> Path:
+        if (p := self._pathobj) is None:
+            p = self._pathobj = Path(self._path)
+        return p
 
     def __repr__(self):
         return f"{type(self).__name__}({self.path!r})"
 
     def read_bytes(self):
-        return self.path.read_bytes()
+        with open(self._path, "rb") as ifh:
+            return ifh.read()
+
+    def read_text(self, encoding="utf8"):
+        with open(self._path, encoding=encoding) as ifh:
+            return ifh.read()
 
-    def read_text(self):
-        return self.path.read_text()
+    def open_text(self, encoding="utf8"):
+        return open(self._path, encoding=encoding)
 
     @classmethod
     def schema_type(cls):
@@ -317,6 +796,11 @@ class FileInOsMediator(Mediator):
         """Return the path to the underlying file of this mediator"""
         return self.path
 
+    def stat(self):
+        """Return the path, modification time and size of the underlying file"""
+        st = os.stat(self._path)
+        return (self._path, st.st_mtime_ns, st.st_size)
+
 
 class FileInOsSchema(ms.Schema):
     """A subclass of `marshmallow.Schema` used to
@@ -0,0 +1,297 @@
+"""Content-addressed storage of configurations
+
+A blob store is a directory where every configuration content is
+stored once, in a file named after its SHA-256 digest
+
+.. code-block:: text
+
+    ROOT/
+        objects/3f/a2c4...   # content, named after its digest
+        refs/ADDRESS         # digest of the content of an address
+
+:class:`BlobMediator` instances point to a content by its digest. Their
+reads are cached in memory by digest, thus shared by all the addresses
+having the same content. Contents never change, which makes the digest
+a perfect stamp for :meth:`Mediator.stat`.
+
+:class:`MarinaBlobs` is a marina which values are stored as digests in
+the ``refs`` directory. Storing a mediator in it copies its content into
+the store, so that identical configurations moored at many addresses use
+disk space only once. Lookups neither read the content nor deserialize
+anything but the digest. Such a marina is added in :mod:`configooseconf`
+with
+
+.. code-block:: python
+
+    handler.add_marina(style="blobs", path="/path/to/store", tags={"blobs"})
+"""
+from . import Marina, Mediator, mediator_dumps, mediator_loads
+from ..util.atomic import write_atomic
+from collections import OrderedDict
+import hashlib
+import marshmallow as ms
+import os
+from pathlib import Path
+import sys
+import threading
+
+# maximum total size of the contents cached in memory
+CACHE_SIZE = 64 * 2**20
+
+_cache = OrderedDict()  # digest -> bytes, in LRU order
+_cache_size = 0
+_cache_lock = threading.Lock()
+
+
+def _cached(digest):
+    with _cache_lock:
+        data = _cache.get(digest)
+        if data is not None:
+            _cache.move_to_end(digest)
+        return data
+
+
+def _remember(digest, data):
+    global _cache_size
+    if len(data) > CACHE_SIZE:
+        return
+    with _cache_lock:
+        if digest in _cache:
+            return
+        _cache[digest] = data
+        _cache_size += len(data)
+        while _cache_size > CACHE_SIZE:
+            _, old = _cache.popitem(last=False)
+            _cache_size -= len(old)
+
+
+def clear_cache():
+    """Forget all the contents cached in memory"""
+    global _cache_size
+    with _cache_lock:
+        _cache.clear()
+        _cache_size = 0
+
+
+class BlobStore:
+    """A directory storing contents under their digest
+
+    :param root: the directory of the store, created when
+        the first content is stored
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.root!r})"
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """Return the digest of a content"""
+        return hashlib.sha256(data).hexdigest()
+
+    def object_path(self, digest) -> Path:
+        """Return the path of the file of a content"""
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def put(self, data: bytes) -> str:
+        """Store a content if it is not already stored
+
+        :return: the content's digest
+        """
+        digest = self.digest(data)
+        p = self.object_path(digest)
+        if not p.exists():
+            p.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(p, data)
+        _remember(digest, data)
+        return digest
+
+    def get(self, digest) -> bytes:
+        """Return a content, from the in-memory cache if possible
+
+        :raises FileNotFoundError: if there is no content with this digest
+        """
+        data = _cached(digest)
+        if data is None:
+            data = self.object_path(digest).read_bytes()
+            _remember(digest, data)
+        return data
+
+    def __contains__(self, digest):
+        return self.object_path(digest).exists()
+
+    def __iter__(self):
+        """Iterate over the digests of the stored contents"""
+        try:
+            dirs = list((self.root / "objects").iterdir())
+        except FileNotFoundError:
+            return
+        for d in dirs:
+            for f in d.iterdir():
+                if not f.name.startswith("."):
+                    yield d.name + f.name
+
+    def discard(self, digest):
+        """Remove a content from the store (missing is OK)
+
+        Hidden files derived from the content, such as the cache files
+        of :mod:`configoose.protocol.literal`, are removed too.
+        """
+        p = self.object_path(digest)
+        p.unlink(missing_ok=True)
+        for q in p.parent.glob(f".{p.name}.*"):
+            q.unlink(missing_ok=True)
+        try:
+            p.parent.rmdir()
+        except OSError:
+            pass  # not empty
+
+
+class BlobMediator(Mediator):
+    """A class of mediators pointing to a content of a :class:`BlobStore`
+
+    :param store: the root directory of the blob store
+    :param digest: the digest of the content
+    :type digest: str
+    """
+
+    __slots__ = ("store", "digest")
+
+    def __init__(self, store, digest):
+        self.store = store if isinstance(store, BlobStore) else BlobStore(store)
+        self.digest = sys.intern(digest)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self.store.root)!r}, {self.digest!r})"
+
+    def read_bytes(self):
+        return self.store.get(self.digest)
+
+    def system_path(self):
+        """Return the path to the file of the content"""
+        return self.store.object_path(self.digest)
+
+    def stat(self):
+        """Return the digest, contents never change"""
+        return ("sha256", self.digest)
+
+    @classmethod
+    def schema_type(cls):
+        return BlobSchema
+
+
+class BlobSchema(ms.Schema):
+    """A subclass of `marshmallow.Schema` used to
+    serialize instances of :class:`BlobMediator`
+    """
+
+    store = ms.fields.Function(lambda obj: str(obj.store.root), deserialize=str)
+    digest = ms.fields.Str()
+
+    @ms.post_load
+    def postload(self, obj, **kwargs):
+        return BlobMediator(obj["store"], obj["digest"])
+
+
+class MarinaBlobs(Marina):
+    """Subclass of :class:`Marina` storing its values in a :class:`BlobStore`.
+
+    :param path: The root directory of the blob store
+    :type path: `pathlib.Path`
+    :param tags: A set of strings used to identify marinas
+
+    Each key is a file of the ``refs`` directory containing the digest of
+    a content. Values are serialized :class:`BlobMediator` instances.
+    Setting a key to another serialized mediator stores the content it
+    points to in the blob store. As a consequence, a configuration file
+    moored in this marina must be moored again after it is edited.
+    """
+
+    def __init__(self, path: Path, tags=()):
+        if not isinstance(path, Path):
+            raise TypeError("Expected pathlib.Path instance, got", repr(path))
+        super().__init__(tags=tags)
+        self.path = path
+        self.store = BlobStore(path)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, tags={self.tags!r})"
+
+    @property
+    def refs(self) -> Path:
+        return self.path / "refs"
+
+    def keys(self):
+        try:
+            names = os.listdir(self.refs)
+        except FileNotFoundError:
+            return []
+        return [sys.intern(n) for n in names if not n.startswith(".")]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def digest(self, key):
+        """Return the digest of the content of a key
+
+        :raises KeyError: if the key is not in the marina
+        """
+        self.is_valid_key(key, keyerror=True)
+        try:
+            with open(self.refs / key) as ifh:
+                return ifh.read().strip()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            raise KeyError(key) from None
+
+    def get_mediator(self, key):
+        return BlobMediator(self.store, self.digest(key))
+
+    def __getitem__(self, key):
+        return mediator_dumps(self.get_mediator(key))
+
+    def __setitem__(self, key, text):
+        self.is_valid_key(key, keyerror=True)
+        mediator = mediator_loads(text)
+        if isinstance(mediator, BlobMediator) and mediator.store.root == self.path:
+            digest = mediator.digest
+        else:
+            digest = self.store.put(mediator.read_bytes())
+        self.refs.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.refs / key, digest.encode())
+
+    def __delitem__(self, key):
+        self.is_valid_key(key, keyerror=True)
+        (self.refs / key).unlink(missing_ok=True)
+
+    def is_valid_key(self, key, keyerror=False):
+        if key == Path(key).name and not key.startswith("."):
+            return True
+        elif keyerror:
+            raise KeyError(key)
+        else:
+            return False
+
+    def gc(self):
+        """Remove the contents that no key refers to
+
+        :return: the number of removed contents
+
+        Don't call this method while other processes set keys in the marina.
+        """
+        used = set()
+        for key in self.keys():
+            try:
+                used.add(self.digest(key))
+            except KeyError:
+                pass
+        removed = 0
+        for digest in list(self.store):
+            if digest not in used:
+                self.store.discard(digest)
+                removed += 1
+        return removed
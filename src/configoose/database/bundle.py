@@ -0,0 +1,201 @@
+"""Bundles of configurations stored in a single file
+
+A bundle is a text file holding many configurations, each with its own
+preamble and address. It consists of sections, each starting with a line
+equal to :data:`SEPARATOR` and followed by a configuration, that is to say
+a preamble and a body, for example
+
+.. code-block:: text
+
+    #--- configoose section ---
+    {
+        "address" : "spam-plugin",
+        "protopath" : "raw",
+    }
+    ...
+    #--- configoose section ---
+    {
+        "address" : "eggs-plugin",
+        "protopath" : "configparser",
+    }
+    ...
+
+The first line of a bundle must be a separator line. Sections are
+accessed through :class:`BundleMemberMediator` instances. The byte
+offsets of the sections are indexed once per process when a bundle is
+first read, and reindexed if the bundle's modification time or size
+changes. Reading a section then reads only its bytes.
+
+``python -m configoose moor MARINA BUNDLE`` moors all the sections of
+a bundle at once. Bundles can be created with :func:`pack`.
+"""
+from . import Mediator
+from ..util.atomic import replacing
+from ..util.split_preamble import split_preamble_buffer
+from collections import defaultdict
+import io
+import marshmallow as ms
+import os
+from pathlib import Path
+import sys
+import threading
+
+SEPARATOR = "#--- configoose section ---"
+_SEP = SEPARATOR.encode()
+
+
+class InvalidBundle(ValueError):
+    pass
+
+
+class _Index:
+    # the sections of a bundle: address -> (start, end) byte offsets
+    def __init__(self, data, stamp):
+        self.stamp = stamp
+        self.sections = {}
+        view = memoryview(data)
+        starts = _separators(data)
+        if not starts or starts[0][0] != 0:
+            raise InvalidBundle("Expected separator line at the beginning of bundle")
+        ends = [s for s, _ in starts[1:]] + [len(data)]
+        for (_, start), end in zip(starts, ends):
+            preamble, _ = split_preamble_buffer(view[start:end])
+            address = sys.intern(preamble["address"])
+            if address in self.sections:
+                raise InvalidBundle("Duplicate address in bundle", address)
+            self.sections[address] = (start, end)
+
+
+def _separators(data):
+    # return the list of pairs (offset of separator line, offset of next line)
+    res = []
+    pos = 0
+    while (i := data.find(_SEP, pos)) >= 0:
+        pos = i + len(_SEP)
+        if i and data[i - 1] != 10:
+            continue
+        j = pos
+        while j < len(data) and data[j] in b" \t\r":
+            j += 1
+        if j == len(data):
+            res.append((i, j))
+        elif data[j] == 10:
+            res.append((i, j + 1))
+    return res
+
+
+# str(path) -> _Index
+_indexes = {}
+_locks = defaultdict(threading.Lock)
+_locks_lock = threading.Lock()
+
+
+def _index(path, fh) -> _Index:
+    # return the shared index of the bundle open as the binary file fh
+    st = os.fstat(fh.fileno())
+    stamp = (st.st_mtime_ns, st.st_size)
+    idx = _indexes.get(path)
+    if idx is not None and idx.stamp == stamp:
+        return idx
+    with _locks_lock:
+        lock = _locks[path]
+    with lock:
+        idx = _indexes.get(path)
+        if idx is None or idx.stamp != stamp:
+            fh.seek(0)
+            idx = _indexes[path] = _Index(fh.read(), stamp)
+        return idx
+
+
+def sections(path):
+    """Return the list of the addresses of the sections of a bundle"""
+    path = os.fspath(path)
+    with open(path, "rb") as fh:
+        return list(_index(path, fh).sections)
+
+
+def is_bundle(path):
+    """Return true if the file's first line is a separator line"""
+    with open(path, "rb") as fh:
+        return fh.readline().rstrip() == _SEP
+
+
+class BundleMemberMediator(Mediator):
+    """A class of mediators pointing to a section of a bundle
+
+    :param path: the path to the bundle
+    :param address: the address in the preamble of the section
+    :type address: str
+    """
+
+    __slots__ = ("path", "address")
+
+    def __init__(self, path, address):
+        self.path = Path(path)
+        self.address = sys.intern(address)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, {self.address!r})"
+
+    def read_bytes(self):
+        path = os.fspath(self.path)
+        with open(path, "rb") as fh:
+            try:
+                start, end = _index(path, fh).sections[self.address]
+            except KeyError:
+                raise KeyError("No section with address in bundle", self.address, path)
+            fh.seek(start)
+            return fh.read(end - start)
+
+    def open_text(self, encoding="utf8"):
+        return io.StringIO(self.read_text(encoding))
+
+    def stat(self):
+        """Return the bundle's path, the section's address, and the bundle's
+        modification time and size. The stamp thus changes when any section
+        of the bundle changes."""
+        st = os.stat(self.path)
+        return (str(self.path), self.address, st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def schema_type(cls):
+        return BundleMemberSchema
+
+
+class BundleMemberSchema(ms.Schema):
+    """A subclass of `marshmallow.Schema` used to
+    serialize instances of :class:`BundleMemberMediator`
+    """
+
+    path = ms.fields.Str()
+    address = ms.fields.Str()
+
+    @ms.post_load
+    def postload(self, obj, **kwargs):
+        return BundleMemberMediator(obj["path"], obj["address"])
+
+
+def pack(dest, files):
+    """Create a bundle holding the contents of configuration files
+
+    :param dest: the path of the bundle to create
+    :param files: an iterable of paths to configuration files
+    :return: the list of the addresses stored in the bundle
+
+    The bundle is written to a temporary file first and renamed, so that
+    processes reading the previous bundle are not disturbed.
+    """
+    dest = Path(dest).resolve()
+    addresses = []
+    with replacing(dest) as tmp, open(tmp, "wb") as ofh:
+        for file in files:
+            data = Path(file).read_bytes()
+            preamble, _ = split_preamble_buffer(data)
+            if preamble["address"] in addresses:
+                raise InvalidBundle("Duplicate address", preamble["address"])
+            ofh.write(_SEP + b"\n")
+            ofh.write(data)
+            if not data.endswith(b"\n"):
+                ofh.write(b"\n")
+            addresses.append(preamble["address"])
+    return addresses
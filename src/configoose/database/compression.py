@@ -0,0 +1,118 @@
+"""Mediators for configuration files stored compressed
+
+Large generated configurations can be stored gzip- or lzma-compressed
+in the file system. They are decompressed incrementally when read,
+which on network file systems costs much less than reading the
+uncompressed file.
+
+Compressed files are moored with ``python -m configoose moor`` like
+other configuration files, their compression method is recognized
+from their suffix. The ``--compress`` option of ``moor`` compresses
+an uncompressed file before mooring it.
+"""
+from . import FileInOsMediator
+from ..util.atomic import replacing
+import marshmallow as ms
+from pathlib import Path
+
+# compression method -> file suffix
+SUFFIXES = {"gzip": ".gz", "lzma": ".xz"}
+
+
+def _module(compression):
+    if compression == "gzip":
+        import gzip
+
+        return gzip
+    elif compression == "lzma":
+        import lzma
+
+        return lzma
+    raise ValueError("Unknown compression method", compression)
+
+
+def compression_of(path):
+    """Return the compression method of a file from its suffix, or None"""
+    suffix = Path(path).suffix
+    for compression, s in SUFFIXES.items():
+        if s == suffix:
+            return compression
+    return None
+
+
+def compress_file(path, compression="gzip"):
+    """Write a compressed copy of a file next to it
+
+    :param path: the path of the file to compress
+    :param compression: `"gzip"` or `"lzma"`
+    :return: the path of the compressed file, which is the path of the
+        original file with an added suffix `.gz` or `.xz`
+    """
+    import shutil
+
+    path = Path(path)
+    dest = path.with_name(path.name + SUFFIXES[compression])
+    with replacing(dest) as tmp:
+        with open(path, "rb") as ifh, _module(compression).open(tmp, "wb") as ofh:
+            shutil.copyfileobj(ifh, ofh)
+    return dest
+
+
+class CompressedFileMediator(FileInOsMediator):
+    """A class of mediators pointing to compressed configuration files
+    stored as regular files in the file system.
+
+    :param path: the path to the underlying compressed file
+    :param compression: `"gzip"` or `"lzma"`. Defaults to the method
+        corresponding to the file's suffix.
+    """
+
+    __slots__ = ("compression",)
+
+    def __init__(self, path, compression=None):
+        super().__init__(path)
+        self.compression = compression or compression_of(self._path)
+        _module(self.compression)  # validate
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, {self.compression!r})"
+
+    def read_bytes(self):
+        with _module(self.compression).open(self._path, "rb") as ifh:
+            return ifh.read()
+
+    def read_text(self, encoding="utf8"):
+        with self.open_text(encoding) as ifh:
+            return ifh.read()
+
+    def open_text(self, encoding="utf8"):
+        return _module(self.compression).open(self._path, "rt", encoding=encoding)
+
+    @classmethod
+    def schema_type(cls):
+        return CompressedFileSchema
+
+
+class CompressedFileSchema(ms.Schema):
+    """A subclass of `marshmallow.Schema` used to
+    serialize instances of :class:`CompressedFileMediator`
+    """
+
+    path = ms.fields.Str()
+    compression = ms.fields.Str()
+
+    @ms.post_load
+    def postload(self, obj, **kwargs):
+        return CompressedFileMediator(obj["path"], obj["compression"])
+
+
+def file_mediator(path):
+    """Return a mediator for a configuration file, compressed or not
+
+    :param path: the path of the file
+    :return: a :class:`CompressedFileMediator` if the file's suffix is
+        that of a compression method, else a :class:`FileInOsMediator`
+    """
+    if compression := compression_of(path):
+        return CompressedFileMediator(path, compression)
+    return FileInOsMediator(path)
@@ -0,0 +1,267 @@
+"""Local mirrors of marinas stored on slow file systems
+
+A mirror is a local directory holding a copy of a source marina and of
+the configuration files that its entries point to
+
+.. code-block:: text
+
+    CACHE/
+        manifest.json   # state of the last synchronization
+        marina/         # a MarinaDirInOs with the rewritten entries
+        files/          # copies of the configuration files
+
+:func:`sync` updates a mirror. The manifest stores, for each entry, the
+digest of the entry and the stat stamp and digest of its configuration
+file, so that only the entries and files that changed are read and
+copied. Copies of configuration files are named after their digest,
+and the mirror's entries point to these copies. Entries whose mediator
+is not a file in the file system are copied unchanged.
+
+A mirror is used in place of its source marina by adding it in
+:mod:`configooseconf` with the style ``"mirror"``
+
+.. code-block:: python
+
+    handler.add_marina(
+        style="mirror", path="/shared/marina", cache="/var/cache/marina", tags={"site"}
+    )
+
+Lookups then only access the local directory. The mirror is synchronized
+when it is added if it doesn't exist yet or if ``sync=True`` is passed,
+and otherwise with ``python -m configoose sync``. The mirror is a
+:class:`MarinaMirror`: mooring or unmooring addresses in it updates the
+source marina first, then synchronizes the mirror.
+"""
+from . import MarinaDirInOs, mediator_dumps, mediator_loads
+from .compression import file_mediator
+from ..util.atomic import replacing, write_atomic
+from collections import namedtuple
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+
+MANIFEST = "manifest.json"
+
+SyncResult = namedtuple("SyncResult", "added updated removed unchanged copied")
+SyncResult.__doc__ = """Counts of entries and files processed by :func:`sync`"""
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as ifh:
+        for chunk in iter(lambda: ifh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_manifest(cache):
+    """Return the manifest of a mirror, an empty dict if there is none
+
+    :raises ValueError: if the manifest is not valid JSON
+    """
+    try:
+        with open(Path(cache) / MANIFEST) as ifh:
+            return json.load(ifh)
+    except FileNotFoundError:
+        return {}
+
+
+def _content(record):
+    # the part of a manifest record that doesn't depend on stat stamps
+    return {k: v for k, v in record.items() if not k.endswith("_stamp")}
+
+
+def sync(source, cache):
+    """Synchronize a local mirror of a marina
+
+    :param source: the source marina
+    :type source: Marina
+    :param cache: the directory of the mirror, created if needed
+    :return: a :class:`SyncResult`
+
+    For a source :class:`MarinaDirInOs`, entries which modification time
+    and size didn't change since the last synchronization are not read.
+    Configuration files are read only if their modification time or size
+    changed, and copied only if their digest changed. Entries are counted
+    as updated only if their digest or the digest of their configuration
+    file changed. A corrupted manifest is ignored, all the entries are
+    then read again.
+    """
+    cache = Path(cache).resolve()
+    files_dir = cache / "files"
+    files_dir.mkdir(parents=True, exist_ok=True)
+    (cache / "marina").mkdir(exist_ok=True)
+    mirror = MarinaDirInOs(cache / "marina")
+    try:
+        old = load_manifest(cache)
+    except ValueError:
+        old = {}
+    new = {}
+    counts = dict.fromkeys(SyncResult._fields, 0)
+    stamps = None
+    if isinstance(source, MarinaDirInOs):
+        # one scandir instead of one read per entry
+        with os.scandir(source.path) as it:
+            stamps = {
+                e.name: [(st := e.stat()).st_mtime_ns, st.st_size]
+                for e in it
+                if e.is_file()
+            }
+    for key in source.keys() if stamps is None else stamps:
+        if key.startswith(".") or not mirror.is_valid_key(key):
+            # skip temporary files of MarinaDirInOs
+            continue
+        prev = old.get(key)
+        stamp = None if stamps is None else stamps[key]
+        text = None
+        if prev and stamp is not None and prev["entry_stamp"] == stamp:
+            record = dict(prev)
+        else:
+            try:
+                text = source[key]
+            except KeyError:
+                continue
+            sha = _digest(text.encode())
+            if prev and prev["entry_sha"] == sha:
+                record, text = dict(prev, entry_stamp=stamp), None
+            else:
+                record = {"entry_stamp": stamp, "entry_sha": sha}
+                record["file"] = _target(text)
+                record["local"] = None
+        if record["file"]:
+            if _sync_file(record, files_dir, counts) or text is not None:
+                if record["local"]:
+                    local = file_mediator(files_dir / record["local"])
+                    mirror[key] = mediator_dumps(local)
+                else:
+                    # dangling entry, copied unchanged
+                    mirror[key] = text
+        elif text is not None:
+            mirror[key] = text
+        if prev is None:
+            counts["added"] += 1
+        elif _content(record) != _content(prev):
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+        new[key] = record
+    # entries of the mirror which are not in the manifest are removed too
+    current = {key for key in mirror.keys() if not key.startswith(".")}
+    for key in (old.keys() | current) - new.keys():
+        try:
+            del mirror[key]
+        except KeyError:
+            pass
+        counts["removed"] += 1
+    write_atomic(cache / MANIFEST, json.dumps(new, indent=0).encode())
+    # remove the copies that are no longer referenced
+    used = {r["local"] for r in new.values() if r.get("local")}
+    for d in files_dir.iterdir():
+        for f in d.iterdir():
+            if f"{d.name}/{f.name}" not in used:
+                f.unlink(missing_ok=True)
+        if not any(d.iterdir()):
+            d.rmdir()
+    return SyncResult(**counts)
+
+
+def _target(text):
+    # return the path of the file of a serialized mediator as a str,
+    # or None if it is not a plain or compressed file mediator
+    try:
+        mediator = mediator_loads(text)
+    except Exception:
+        return None
+    target = mediator.system_path()
+    if target is None or type(file_mediator(target)) is not type(mediator):
+        return None
+    return str(target)
+
+
+def _sync_file(record, files_dir, counts):
+    # update the local copy of a configuration file, return true if
+    # the copy changed
+    src = record["file"]
+    try:
+        stamp = _stamp(src)
+    except OSError:
+        # dangling entry, keep the last copy if any
+        return False
+    local_ok = record["local"] and (files_dir / record["local"]).is_file()
+    if local_ok and record.get("file_stamp") == stamp:
+        return False
+    sha = _file_digest(src)
+    record["file_stamp"] = stamp
+    if local_ok and record.get("file_sha") == sha:
+        return False
+    local = f"{sha[:16]}/{Path(src).name}"
+    dest = files_dir / local
+    if not dest.exists():
+        dest.parent.mkdir(exist_ok=True)
+        with replacing(dest) as tmp:
+            shutil.copyfile(src, tmp)
+        counts["copied"] += 1
+    record["file_sha"], record["local"] = sha, local
+    return True
+
+
+class MarinaMirror(MarinaDirInOs):
+    """Subclass of :class:`MarinaDirInOs` for the ``marina`` directory
+    of a mirror, which writes through to the source marina
+
+    :param source: the source marina
+    :type source: Marina
+    :param cache: the directory of the mirror
+    :param tags: A set of strings used to identify marinas
+
+    Setting or deleting a key sets or deletes it in the source marina, then
+    synchronizes the mirror, so that the change survives later
+    synchronizations.
+    """
+
+    def __init__(self, source, cache, tags=()):
+        self.cache = Path(cache).resolve()
+        super().__init__(self.cache / "marina", tags=tags)
+        self.source = source
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}({self.source!r}, {self.cache!r}, tags={self.tags!r})"
+        )
+
+    def __setitem__(self, key, text):
+        self.source[key] = text
+        sync(self.source, self.cache)
+
+    def __delitem__(self, key):
+        del self.source[key]
+        sync(self.source, self.cache)
+
+
+def mirror(db, source, cache, sync_first=True):
+    """Replace a marina of a database by its local mirror
+
+    :param db: a :class:`Db` instance
+    :param source: a marina in the database
+    :param cache: the directory of the mirror
+    :param sync_first: if set, synchronize the mirror first
+    :return: the new :class:`MarinaMirror`, which has the tags of the
+        source marina
+    """
+    if sync_first:
+        sync(source, cache)
+    local = MarinaMirror(source, cache, tags=source.tags)
+    path = db.path
+    path[path.index(source)] = local
+    return local
@@ -0,0 +1,430 @@
+"""Marinas and mediators served by an HTTP configuration service
+
+The service is expected to expose a marina as a base URL where
+
+* ``GET {url}/{key}`` returns the serialized mediator stored for ``key``,
+  or the status 404 if the key is missing,
+* ``GET {url}/`` returns a JSON list of the keys,
+* ``PUT {url}/{key}`` and ``DELETE {url}/{key}`` update the marina.
+
+The configuration content itself can be served by the same service
+and accessed through :class:`HttpMediator` instances.
+
+All requests go through an :class:`HttpClient` which keeps alive a
+pool of connections per host and stores responses in an on-disk cache.
+Cached responses younger than ``max_age`` seconds are served without
+any network access. Older responses are revalidated with a conditional
+request (``If-None-Match``/``If-Modified-Since``). Missing resources
+(status 404 or 410) are cached the same way, so that looking up an
+address served by a later marina doesn't cost a request each time. If
+the service cannot be reached, stale cached responses are served so
+that programs keep working offline, and :class:`MarinaHttp` treats the
+keys never fetched as missing.
+
+Marinas of this type are added in :mod:`configooseconf` with
+
+.. code-block:: python
+
+    handler.add_marina(style="http", url="http://host/marina", tags={"remote"})
+"""
+from . import Marina, Mediator
+from ..util.atomic import write_atomic
+from collections import defaultdict
+from contextlib import contextmanager
+import hashlib
+import http.client
+import json
+import marshmallow as ms
+import os
+from pathlib import Path
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+DEFAULT_MAX_AGE = 60.0
+
+
+class HttpError(OSError):
+    """Failure of a request to an HTTP configuration service
+
+    :param message: description of the failure
+    :param url: the requested URL
+    :param status: the HTTP status of the response, or None if the
+        service could not be reached
+    """
+
+    def __init__(self, message, url, status=None):
+        super().__init__(f"{message}: {url}")
+        self.url = url
+        self.status = status
+
+
+def default_cache_dir() -> Path:
+    """Return the default directory of the on-disk cache
+
+    It is the value of the environment variable ``CONFIGOOSE_HTTP_CACHE``
+    if set, else a directory ``configoose/http`` in the user's cache directory.
+    """
+    if p := os.environ.get("CONFIGOOSE_HTTP_CACHE"):
+        return Path(p)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "configoose" / "http"
+
+
+class ConnectionPool:
+    """Pool of persistent HTTP connections, indexed by scheme and host
+
+    :param maxsize: maximum number of idle connections kept per host
+    :param timeout: socket timeout in seconds
+    """
+
+    def __init__(self, maxsize=4, timeout=10.0):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, netloc):
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        elif scheme == "http":
+            return http.client.HTTPConnection(netloc, timeout=self.timeout)
+        raise ValueError("Unsupported URL scheme", scheme)
+
+    @contextmanager
+    def connection(self, scheme, netloc, fresh=False):
+        """Context manager yielding a connection to a host
+
+        :param fresh: if set, open a new connection instead of reusing
+            an idle one
+
+        The connection returns to the pool on exit, unless an exception occurred.
+        """
+        key = (scheme, netloc)
+        conn = None
+        if not fresh:
+            with self._lock:
+                conn = self._idle[key].pop() if self._idle[key] else None
+        if conn is None:
+            conn = self._connect(scheme, netloc)
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        with self._lock:
+            if len(self._idle[key]) < self.maxsize:
+                self._idle[key].append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+class HttpClient:
+    """HTTP client with connection pooling and a conditional on-disk cache
+
+    :param cache: directory of the on-disk cache, created if needed.
+        Defaults to :func:`default_cache_dir`.
+    :type cache: str or `pathlib.Path`
+    :param pool: the connection pool to use. A new one is created by default.
+    """
+
+    def __init__(self, cache=None, pool=None):
+        self.cache = Path(cache) if cache else default_cache_dir()
+        self.pool = pool or ConnectionPool()
+        # url -> (meta, body) for entries read or written by this process
+        self._memory = {}
+        # url -> lock, to revalidate each url once at a time
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self.cache)!r})"
+
+    def _lock_for(self, url):
+        with self._locks_lock:
+            return self._locks[url]
+
+    def _cache_path(self, url):
+        return self.cache / hashlib.sha256(url.encode()).hexdigest()
+
+    def _load(self, url):
+        try:
+            return self._memory[url]
+        except KeyError:
+            pass
+        p = self._cache_path(url)
+        try:
+            meta = json.loads(p.with_suffix(".json").read_text())
+            body = p.with_suffix(".body").read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return self._memory.setdefault(url, (meta, body))
+
+    def _store(self, url, meta, body):
+        self._memory[url] = (meta, body)
+        p = self._cache_path(url)
+        try:
+            self.cache.mkdir(parents=True, exist_ok=True)
+            for suffix, data in (
+                (".body", body),
+                (".json", json.dumps(meta).encode()),
+            ):
+                write_atomic(p.with_suffix(suffix), data)
+        except OSError:
+            # the cache is an optimization, failing to write it is not an error
+            pass
+
+    def _forget(self, url):
+        self._memory.pop(url, None)
+        p = self._cache_path(url)
+        for suffix in (".json", ".body"):
+            p.with_suffix(suffix).unlink(missing_ok=True)
+
+    def request(self, method, url, body=None, headers=None):
+        """Send a request through the pool and return ``(status, headers, body)``
+
+        A request on a reused connection that the server closed in the
+        meantime is retried once on a new connection.
+        """
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+        for attempt in (0, 1):
+            try:
+                with self.pool.connection(
+                    parts.scheme, parts.netloc, fresh=bool(attempt)
+                ) as conn:
+                    conn.request(method, target, body=body, headers=headers or {})
+                    resp = conn.getresponse()
+                    data = resp.read()
+                    if resp.will_close:
+                        conn.close()
+                    return resp.status, resp.headers, data
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if attempt:
+                    raise
+
+    def is_missing(self, url, max_age=DEFAULT_MAX_AGE) -> bool:
+        """Return true if the cache tells that a resource was missing less
+        than `max_age` seconds ago. No request is sent."""
+        entry = self._load(url)
+        return bool(
+            entry
+            and entry[0].get("missing")
+            and time.time() - entry[0]["fetched"] < max_age
+        )
+
+    @staticmethod
+    def _answer(url, entry):
+        # return the body of a cached entry, raise KeyError if it is a miss
+        if entry[0].get("missing"):
+            raise KeyError(url)
+        return entry[1]
+
+    def get(self, url, max_age=DEFAULT_MAX_AGE) -> bytes:
+        """Return the body of a resource, using the cache if possible
+
+        :param url: the resource's URL
+        :param max_age: number of seconds during which a cached response,
+            including a miss, is served without revalidation
+        :raises KeyError: if the server answers 404 or 410
+        :raises HttpError: for other error statuses, or if the server
+            cannot be reached and the resource is not cached. The
+            attribute `status` of the error is None in the latter case.
+        """
+        entry = self._load(url)
+        if entry and time.time() - entry[0]["fetched"] < max_age:
+            return self._answer(url, entry)
+        with self._lock_for(url):
+            # another thread may have revalidated the entry
+            entry = self._load(url)
+            if entry and time.time() - entry[0]["fetched"] < max_age:
+                return self._answer(url, entry)
+            headers = {}
+            if entry and not entry[0].get("missing"):
+                if etag := entry[0].get("etag"):
+                    headers["If-None-Match"] = etag
+                if modified := entry[0].get("last_modified"):
+                    headers["If-Modified-Since"] = modified
+            try:
+                status, resp_headers, body = self.request("GET", url, headers=headers)
+            except (OSError, http.client.HTTPException) as exc:
+                if entry:
+                    # offline: serve stale content
+                    return self._answer(url, entry)
+                raise HttpError("Cannot reach", url) from exc
+            if status == 304 and entry and not entry[0].get("missing"):
+                meta = dict(entry[0], fetched=time.time())
+                self._store(url, meta, entry[1])
+                return entry[1]
+            elif status == 200:
+                meta = {
+                    "url": url,
+                    "etag": resp_headers.get("ETag"),
+                    "last_modified": resp_headers.get("Last-Modified"),
+                    "fetched": time.time(),
+                }
+                self._store(url, meta, body)
+                return body
+            elif status in (404, 410):
+                meta = {"url": url, "missing": True, "fetched": time.time()}
+                self._store(url, meta, b"")
+                raise KeyError(url)
+            raise HttpError(f"HTTP status {status}", url, status)
+
+    def put(self, url, body: bytes):
+        """Store a resource on the server and in the cache"""
+        status, headers, data = self.request("PUT", url, body=body)
+        if status not in (200, 201, 204):
+            raise HttpError(f"HTTP status {status}", url, status)
+        with self._lock_for(url):
+            self._forget(url)
+
+    def delete(self, url):
+        """Delete a resource on the server (missing is OK)"""
+        status, headers, data = self.request("DELETE", url)
+        if status not in (200, 202, 204, 404, 410):
+            raise HttpError(f"HTTP status {status}", url, status)
+        with self._lock_for(url):
+            self._forget(url)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def client(cache=None) -> HttpClient:
+    """Return the shared :class:`HttpClient` using a given cache directory
+
+    :param cache: the cache directory, defaults to :func:`default_cache_dir`
+    """
+    key = str(cache or default_cache_dir())
+    with _clients_lock:
+        try:
+            return _clients[key]
+        except KeyError:
+            return _clients.setdefault(key, HttpClient(key))
+
+
+class MarinaHttp(Marina):
+    """Subclass of :class:`Marina` served by an HTTP configuration service
+
+    :param url: the base URL of the marina
+    :type url: str
+    :param tags: A set of strings used to identify marinas
+    :param cache: directory of the on-disk cache, see :func:`client`
+    :param max_age: number of seconds during which cached values and
+        misses are served without revalidation
+    :param offline_miss: if set, a key that is not cached while the service
+        cannot be reached is missing, so that :class:`Db` lookups go on with
+        the next marinas. Otherwise :class:`HttpError` is raised.
+    :type offline_miss: bool
+    """
+
+    def __init__(
+        self, url, tags=(), cache=None, max_age=DEFAULT_MAX_AGE, offline_miss=True
+    ):
+        super().__init__(tags=tags)
+        self.url = url.rstrip("/")
+        self.max_age = max_age
+        self.offline_miss = offline_miss
+        self.client = client(cache)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.url!r}, tags={self.tags!r})"
+
+    def _key_url(self, key):
+        self.is_valid_key(key, keyerror=True)
+        return f"{self.url}/{quote(key, safe='')}"
+
+    def __getitem__(self, key):
+        try:
+            return self.client.get(self._key_url(key), self.max_age).decode()
+        except HttpError as exc:
+            if self.offline_miss and exc.status is None:
+                raise KeyError(key) from exc
+            raise
+
+    def may_contain(self, key):
+        """Return false if the key was missing less than `max_age` seconds
+        ago, without any request. This is true while the service cannot
+        be reached."""
+        return not (
+            self.is_valid_key(key)
+            and self.client.is_missing(self._key_url(key), self.max_age)
+        )
+
+    def __setitem__(self, key, text):
+        self.client.put(self._key_url(key), text.encode())
+
+    def __delitem__(self, key):
+        self.client.delete(self._key_url(key))
+
+    def keys(self):
+        return json.loads(self.client.get(f"{self.url}/", self.max_age))
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def is_valid_key(self, key, keyerror=False):
+        if key and key not in (".", ".."):
+            return True
+        elif keyerror:
+            raise KeyError(key)
+        else:
+            return False
+
+
+class HttpMediator(Mediator):
+    """A class of mediators pointing to configuration content
+    served over HTTP
+
+    :param url: the URL of the configuration content
+    :param cache: directory of the on-disk cache, see :func:`client`
+    :param max_age: number of seconds during which the cached content is
+        served without revalidation
+    """
+
+    def __init__(self, url, cache=None, max_age=DEFAULT_MAX_AGE):
+        self.url = url
+        self.cache = cache
+        self.max_age = max_age
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.url!r})"
+
+    def read_bytes(self):
+        return client(self.cache).get(self.url, self.max_age)
+
+    @classmethod
+    def schema_type(cls):
+        return HttpSchema
+
+
+class HttpSchema(ms.Schema):
+    """A subclass of `marshmallow.Schema` used to
+    serialize instances of :class:`HttpMediator`
+    """
+
+    url = ms.fields.Str()
+    cache = ms.fields.Str(allow_none=True)
+    max_age = ms.fields.Float()
+
+    @ms.post_load
+    def postload(self, obj, **kwargs):
+        return HttpMediator(**obj)
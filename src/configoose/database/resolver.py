@@ -0,0 +1,331 @@
+"""Resolve addresses through a local daemon over a Unix domain socket
+
+The daemon, started with ``python -m configoose serve``, keeps an
+initialized database and caches the values found in its marinas. The
+cache is cleared when the directories and files underlying the marinas
+change, which the daemon detects by polling their modification times.
+
+Client processes access the daemon through a :class:`MarinaSocket`,
+usually wrapped in a :class:`Db` by :func:`connect`. If the environment
+variable ``CONFIGOOSE_RESOLVER`` is set to the path of the daemon's socket
+when configoose's root database is initialized, the root database is
+such a client database and the ``configooseconf`` modules are not read.
+
+The protocol consists of JSON objects, one per line. Requests have an
+``"op"`` key, one of
+
+* ``"get"`` with a ``"keys"`` list: the response is a ``"values"`` list with,
+  for each key, a pair ``[value, tags]`` (the serialized mediator and the
+  tags of the marina where it was found) or null.
+* ``"keys"``: the response has a ``"keys"`` list of all the keys.
+* ``"ping"``: the response is ``{"ok": true}``.
+
+Batched ``"get"`` requests resolve many keys in a single round trip.
+
+Only lookups go through the daemon. The command line interface ignores
+``CONFIGOOSE_RESOLVER`` for the subcommands that list or modify marinas.
+
+As the daemon's answers tell client processes which code to execute,
+clients only talk to a daemon running as the same user, and the daemon
+only listens in a directory that other users cannot write to.
+"""
+from . import Db, Marina, mediator_loads
+import errno
+import json
+import os
+from pathlib import Path
+import socket
+import stat
+import struct
+import threading
+
+
+def default_socket_path() -> Path:
+    """Return the default path of the daemon's socket
+
+    It is ``configoose.sock`` in the directory ``XDG_RUNTIME_DIR`` if this
+    environment variable is set, else ``resolver.sock`` in the private
+    directory ``/tmp/configoose-{uid}``, created by the daemon with mode 0700.
+    """
+    if d := os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(d) / "configoose.sock"
+    return Path(f"/tmp/configoose-{os.getuid()}") / "resolver.sock"
+
+
+def _check_directory(path):
+    # raise PermissionError unless the directory of a socket belongs to
+    # us or to root and other users cannot write to it
+    st = os.lstat(path)
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or st.st_uid not in (os.getuid(), 0)
+        or st.st_mode & 0o022
+    ):
+        raise PermissionError(
+            errno.EACCES, "Unsafe directory for the resolver socket", str(path)
+        )
+
+
+def _check_peer(sock, path):
+    # raise PermissionError unless the process listening on the connected
+    # socket runs as the current user
+    uid = os.getuid()
+    if hasattr(socket, "SO_PEERCRED"):
+        creds = sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        peer = struct.unpack("3i", creds)[1]
+    else:
+        peer = os.stat(path).st_uid
+    if peer != uid:
+        raise PermissionError(
+            errno.EACCES, "Resolver socket owned by another user", str(path)
+        )
+
+
+def _connect(path):
+    # return a socket connected to a daemon of the current user
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        _check_peer(sock, path)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+class Resolver:
+    """Caching resolver used by the daemon
+
+    :param db: the database where addresses are resolved
+    :type db: Db
+    :param interval: number of seconds between two checks of the marinas
+        modification times
+    """
+
+    def __init__(self, db, interval=1.0):
+        self.db = db
+        self.interval = interval
+        self._cache = {}
+        self._stamps = self._current_stamps()
+        self._stop = threading.Event()
+
+    def get(self, key):
+        """Return the pair `(value, tags)` for a key, or None"""
+        cache = self._cache  # check() may replace it meanwhile
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        res = None
+        for marina in self.db.snapshot():
+            try:
+                res = (marina[key], sorted(marina.tags))
+            except KeyError:
+                continue
+            break
+        return cache.setdefault(key, res)
+
+    def keys(self):
+        return list(self.db)
+
+    def _current_stamps(self):
+        stamps = {}
+        for marina in self.db.snapshot():
+            if isinstance(p := getattr(marina, "path", None), Path):
+                try:
+                    stamps[p] = os.stat(p).st_mtime_ns
+                except OSError:
+                    stamps[p] = None
+        return stamps
+
+    def check(self):
+        """Clear the cache if a marina changed since the last check"""
+        stamps = self._current_stamps()
+        if stamps != self._stamps:
+            self._stamps = stamps
+            self._cache = {}
+
+    def watch(self):
+        """Check the marinas periodically, until :meth:`stop` is called"""
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop.set()
+
+    def handle(self, request):
+        """Return the response to a decoded request"""
+        op = request.get("op")
+        if op == "get":
+            return {"values": [self.get(key) for key in request["keys"]]}
+        elif op == "keys":
+            return {"keys": self.keys()}
+        elif op == "ping":
+            return {"ok": True}
+        return {"error": f"unknown op {op!r}"}
+
+
+def serve(db, path=None, interval=1.0, ready=None):
+    """Serve lookups in a database on a Unix domain socket until interrupted
+
+    :param db: the database where addresses are resolved
+    :param path: the socket's path, defaults to :func:`default_socket_path`
+    :param interval: see :class:`Resolver`
+    :param ready: an optional callable called with the server once it listens
+    :raises OSError: with errno `EADDRINUSE` if a daemon already listens on
+        the socket
+    :raises PermissionError: if other users can write to the socket's
+        directory
+
+    A stale socket file left by a daemon that died is replaced. The
+    socket's directory is created with mode 0700 if it doesn't exist.
+    """
+    import socketserver
+
+    path = Path(path or default_socket_path())
+    path.parent.mkdir(mode=0o700, exist_ok=True)
+    _check_directory(path.parent)
+    if _is_listening(path):
+        raise OSError(
+            errno.EADDRINUSE, "A resolver daemon already listens on", str(path)
+        )
+    resolver = Resolver(db, interval)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    response = resolver.handle(json.loads(line))
+                except Exception as exc:
+                    response = {"error": repr(exc)}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    path.unlink(missing_ok=True)
+    old_umask = os.umask(0o077)
+    try:
+        server = Server(str(path), Handler)
+    finally:
+        os.umask(old_umask)
+    watcher = threading.Thread(target=resolver.watch, daemon=True)
+    watcher.start()
+    try:
+        with server:
+            if ready:
+                ready(server)
+            server.serve_forever()
+    finally:
+        resolver.stop()
+        path.unlink(missing_ok=True)
+
+
+def _is_listening(path):
+    # return true if a process accepts connections on the socket path
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+class MarinaSocket(Marina):
+    """Read only subclass of :class:`Marina` forwarding lookups to a
+    resolver daemon
+
+    :param path: the daemon's socket path, defaults to :func:`default_socket_path`
+    :param tags: A set of strings used to identify marinas
+
+    Each thread uses its own persistent connection to the daemon.
+    :meth:`locate` returns a :class:`MarinaSocket` having the tags of
+    the daemon's marina where the key was found.
+    """
+
+    read_only = True
+
+    def __init__(self, path=None, tags=()):
+        super().__init__(tags=tags)
+        self.path = Path(path or default_socket_path())
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, tags={self.tags!r})"
+
+    def request(self, request):
+        """Send a request to the daemon and return its decoded response
+
+        :raises PermissionError: if the daemon runs as another user
+        """
+        for attempt in (0, 1):
+            f = getattr(self._local, "file", None)
+            if f is None:
+                sock = _connect(self.path)
+                f = self._local.file = sock.makefile("rwb")
+                sock.close()  # the file keeps the socket open
+            try:
+                f.write(json.dumps(request).encode() + b"\n")
+                f.flush()
+                if line := f.readline():
+                    break
+                raise ConnectionError("Resolver closed the connection")
+            except OSError:
+                f.close()
+                self._local.file = None
+                if attempt:
+                    raise
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def get_many(self, keys):
+        """Return the list of pairs `(value, tags)` or None for many keys"""
+        return self.request({"op": "get", "keys": list(keys)})["values"]
+
+    def lookup(self, key):
+        """Return the pair `(value, tags)` found by the daemon for a key
+
+        :raises KeyError: if the key is not found
+        """
+        if (res := self.get_many([key])[0]) is None:
+            raise KeyError(key)
+        return res[0], res[1]
+
+    def __getitem__(self, key):
+        return self.lookup(key)[0]
+
+    def locate(self, key):
+        value, tags = self.lookup(key)
+        return MarinaSocket(self.path, tags=tags), mediator_loads(value)
+
+    def __iter__(self):
+        return iter(self.request({"op": "keys"})["keys"])
+
+    def __len__(self):
+        return len(self.request({"op": "keys"})["keys"])
+
+    def __setitem__(self, key, text):
+        raise TypeError(f"{type(self).__name__} is read only")
+
+    def __delitem__(self, key):
+        if key in self:
+            raise TypeError(f"{type(self).__name__} is read only")
+        raise KeyError(key)
+
+
+def connect(path=None):
+    """Return a :class:`Db` forwarding its lookups to a resolver daemon
+
+    :param path: the daemon's socket path, defaults to :func:`default_socket_path`
+    :raises OSError: if the daemon cannot be reached or runs as another user
+    """
+    marina = MarinaSocket(path, tags={"resolver"})
+    marina.request({"op": "ping"})
+    return Db(marina)
@@ -0,0 +1,109 @@
+"""Mediators for configuration files shipped as package resources
+
+Libraries can ship default configurations as resources inside their
+packages and moor them by address. A :class:`ResourceMediator` is
+serialized as the pair (package, resource) and reads the resource
+through :mod:`importlib.resources`, which works the same for packages
+installed as directories, in zip files (zipimport) or in zipapps,
+without extracting anything to temporary files.
+
+Resources are moored with the ``--resource`` option of ``moor``
+
+.. code-block:: bash
+
+    python -m configoose moor --resource initial yourpackage:configs/default.cfg
+"""
+from . import Mediator
+from importlib import resources
+import marshmallow as ms
+import os
+import threading
+
+# package name -> Traversable root of the package's resources
+_roots = {}
+_lock = threading.Lock()
+
+
+def root(package):
+    """Return the cached :class:`importlib.resources.abc.Traversable`
+    root of a package's resources. The package is imported on first call."""
+    try:
+        return _roots[package]
+    except KeyError:
+        pass
+    with _lock:
+        if package not in _roots:
+            _roots[package] = resources.files(package)
+        return _roots[package]
+
+
+def parse_spec(spec):
+    """Split a string ``"package:resource"`` into a pair"""
+    package, sep, resource = spec.partition(":")
+    if not (sep and package and resource):
+        raise ValueError("Expected PACKAGE:RESOURCE, got", spec)
+    return package, resource
+
+
+class ResourceMediator(Mediator):
+    """A class of mediators pointing to a resource of a package
+
+    :param package: the dotted name of the package
+    :type package: str
+    :param resource: the path of the resource relative to the package,
+        with components separated by ``/``
+    :type resource: str
+    """
+
+    __slots__ = ("package", "resource")
+
+    def __init__(self, package, resource):
+        self.package = package
+        self.resource = resource
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.package!r}, {self.resource!r})"
+
+    def traversable(self):
+        """Return the :class:`Traversable` of the resource"""
+        return root(self.package).joinpath(self.resource)
+
+    def read_bytes(self):
+        return self.traversable().read_bytes()
+
+    def read_text(self, encoding="utf8"):
+        return self.traversable().read_text(encoding)
+
+    def open_text(self, encoding="utf8"):
+        return self.traversable().open("r", encoding=encoding)
+
+    def system_path(self):
+        """Return the path of the resource if it is a file in the
+        file system, else None"""
+        t = self.traversable()
+        return t if isinstance(t, os.PathLike) and os.path.isfile(t) else None
+
+    def stat(self):
+        """Return the path, modification time and size of the resource if
+        it is a file in the file system, else None"""
+        if (p := self.system_path()) is None:
+            return None
+        st = os.stat(p)
+        return (str(p), st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def schema_type(cls):
+        return ResourceSchema
+
+
+class ResourceSchema(ms.Schema):
+    """A subclass of `marshmallow.Schema` used to
+    serialize instances of :class:`ResourceMediator`
+    """
+
+    package = ms.fields.Str()
+    resource = ms.fields.Str()
+
+    @ms.post_load
+    def postload(self, obj, **kwargs):
+        return ResourceMediator(obj["package"], obj["resource"])
@@ -0,0 +1,139 @@
+"""Registry of marina styles
+
+A marina style is a name such as ``"os-directory"`` used in
+:mod:`configooseconf` files to add marinas to the root database
+
+.. code-block:: python
+
+    def configure(handler):
+        handler.add_marina(style="os-directory", path="/some/dir", tags={"initial"})
+
+Each style is implemented by a factory, a callable that receives the
+keyword arguments passed to ``add_marina()`` (except ``style``) and
+returns a new :class:`Marina` instance.
+
+Styles are registered with :func:`register` or declared by installed
+distributions as entry points in the group ``"configoose.marina_styles"``.
+Entry points are only imported when their style is used.
+"""
+from . import Marina, MarinaDirInOs
+from ..util.entrypoints import EntryPointIndex
+from pathlib import Path
+
+
+class UnknownStyle(LookupError):
+    pass
+
+
+# style name -> marina factory
+_factories = {}
+
+plugins = EntryPointIndex("configoose.marina_styles")
+
+
+def register(style: str, factory=None):
+    """Register a marina factory for a style
+
+    :param style: the name of the style
+    :type style: str
+    :param factory: a callable returning a :class:`Marina` instance. If
+        omitted, the function returns a decorator.
+    """
+    if factory is None:
+        def decorator(func):
+            register(style, func)
+            return func
+
+        return decorator
+    _factories[style] = factory
+    return factory
+
+
+def is_registered(style: str) -> bool:
+    """Indicates whether a factory has been registered for a style
+
+    Unlike :func:`factory`, this function doesn't look for entry points.
+    """
+    return style in _factories
+
+
+def factory(style: str):
+    """Return the marina factory registered for a style
+
+    :param style: the name of the style
+    :type style: str
+    :raises UnknownStyle: if no factory exists for this style
+    """
+    try:
+        return _factories[style]
+    except KeyError:
+        pass
+    try:
+        func = plugins.load(style)
+    except KeyError:
+        raise UnknownStyle(style) from None
+    return _factories.setdefault(style, func)
+
+
+def create(style: str, **kwargs) -> Marina:
+    """Create a new marina of a given style
+
+    :param style: the name of the style
+    :type style: str
+    :param kwargs: keyword arguments passed to the style's factory
+    :raises UnknownStyle: if no factory exists for this style
+    """
+    return factory(style)(**kwargs)
+
+
+@register("os-directory")
+def _os_directory(path, tags=(), bloom=False, **kwargs):
+    return MarinaDirInOs(Path(path), tags=tags, bloom=bloom)
+
+
+@register("os-symlinks")
+def _os_symlinks(path, tags=(), **kwargs):
+    from .symlink import MarinaSymlinks
+
+    return MarinaSymlinks(Path(path), tags=tags)
+
+
+@register("mirror")
+def _mirror(path, cache, tags=(), sync=False, **kwargs):
+    from . import mirror
+
+    source = MarinaDirInOs(Path(path), tags=tags)
+    exists = (Path(cache) / mirror.MANIFEST).exists()
+    if sync or not exists:
+        try:
+            mirror.sync(source, cache)
+        except (OSError, ValueError):
+            if not exists:
+                # no usable mirror, use the source marina directly
+                return source
+    return mirror.MarinaMirror(source, cache, tags=tags)
+
+
+@register("blobs")
+def _blobs(path, tags=(), **kwargs):
+    from .blobstore import MarinaBlobs
+
+    return MarinaBlobs(Path(path), tags=tags)
+
+
+@register("http")
+def _http(url, tags=(), cache=None, max_age=None, offline_miss=True, **kwargs):
+    from .remote import DEFAULT_MAX_AGE, MarinaHttp
+
+    if max_age is None:
+        max_age = DEFAULT_MAX_AGE
+    return MarinaHttp(
+        url, tags=tags, cache=cache, max_age=max_age, offline_miss=offline_miss
+    )
+
+
+@register("zip")
+def _zip(path, tags=(), prefix=None, **kwargs):
+    from .ziparchive import DEFAULT_PREFIX, MarinaZip
+
+    return MarinaZip(Path(path), tags=tags, prefix=prefix or DEFAULT_PREFIX)
@@ -0,0 +1,105 @@
+"""Marinas made of symbolic links to configuration files
+
+In a marina of style ``"os-symlinks"``, each address is a symbolic link
+in the marina's directory pointing to the configuration file, so that
+``ls -l`` shows where every address leads. Looking up an address is a
+single ``readlink`` system call, the mediator is derived from the link's
+target without reading any file nor deserializing anything.
+
+Such a marina is added in :mod:`configooseconf` with
+
+.. code-block:: python
+
+    handler.add_marina(style="os-symlinks", path="/path/to/dir", tags={"links"})
+
+and configuration files are moored in it with ``python -m configoose moor``
+as in any marina. Only mediators pointing to files in the file system,
+such as :class:`FileInOsMediator`, can be stored in these marinas.
+"""
+from . import Marina, mediator_dumps, mediator_loads
+from .compression import file_mediator
+from ..util.atomic import replacing
+import os
+from pathlib import Path
+import sys
+
+
+class MarinaSymlinks(Marina):
+    """Subclass of :class:`Marina` built on a directory of symbolic links.
+    Keys are the names of the links and values are serialized mediators
+    for the links' targets.
+
+    :param path: The path to the underlying directory
+    :type path: `pathlib.Path`
+    :param tags: A set of strings used to identify marinas
+
+    Relative link targets are relative to the directory.
+    """
+
+    def __init__(self, path: Path, tags=()):
+        if not isinstance(path, Path):
+            raise TypeError("Expected pathlib.Path instance, got", repr(path))
+        super().__init__(tags=tags)
+        self.path = path
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, tags={self.tags!r})"
+
+    def keys(self):
+        with os.scandir(self.path) as it:
+            return [
+                sys.intern(e.name)
+                for e in it
+                if e.is_symlink() and not e.name.startswith(".")
+            ]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def target(self, key):
+        """Return the path pointed to by the link of a key
+
+        :raises KeyError: if there is no such link
+        """
+        self.is_valid_key(key, keyerror=True)
+        try:
+            target = os.readlink(os.path.join(self.path, key))
+        except OSError:
+            # missing, or not a link
+            raise KeyError(key) from None
+        return os.path.join(self.path, target)
+
+    def get_mediator(self, key):
+        return file_mediator(self.target(key))
+
+    def __getitem__(self, key):
+        return mediator_dumps(self.get_mediator(key))
+
+    def __setitem__(self, key, text):
+        self.is_valid_key(key, keyerror=True)
+        # the mediator must be the one derived from its target
+        mediator = mediator_loads(text)
+        target = mediator.system_path()
+        if target is None or type(file_mediator(target)) is not type(mediator):
+            raise TypeError(
+                f"{type(self).__name__} can only store mediators of files", text
+            )
+        with replacing(self.path / key) as tmp:
+            os.symlink(os.path.abspath(target), tmp)
+
+    def __delitem__(self, key):
+        self.is_valid_key(key, keyerror=True)
+        p = self.path / key
+        if p.is_symlink():
+            p.unlink(missing_ok=True)
+
+    def is_valid_key(self, key, keyerror=False):
+        if key == Path(key).name and not key.startswith("."):
+            return True
+        elif keyerror:
+            raise KeyError(key)
+        else:
+            return False
@@ -0,0 +1,210 @@
+"""Marinas and mediators served from a single zip archive
+
+A zip archive can hold both the entries of a marina, as members named
+``{prefix}{key}`` containing serialized mediators, and the configuration
+content, as other members accessed through :class:`ZipMemberMediator`
+instances. Nothing is extracted to disk.
+
+Each archive is opened once per process. Its central directory is read
+at that time and indexed in memory, thus lookups and reads don't open
+any file. An archive replaced on disk is detected by its modification
+time and size, and reopened.
+
+Such archives are created with :func:`pack` and added in
+:mod:`configooseconf` with
+
+.. code-block:: python
+
+    handler.add_marina(style="zip", path="/path/to/release.zip", tags={"release"})
+"""
+from . import Marina, Mediator, mediator_dumps
+from ..util.atomic import replacing
+from ..util.split_preamble import split_preamble
+from collections import defaultdict
+import io
+import marshmallow as ms
+import os
+from pathlib import Path
+import sys
+import threading
+import zipfile
+
+DEFAULT_PREFIX = "marina/"
+
+
+class _Archive:
+    # an open zip archive and the index of its marina entries
+    def __init__(self, path, stamp):
+        self.stamp = stamp
+        self.zipfile = zipfile.ZipFile(path)
+        self.infos = {info.filename: info for info in self.zipfile.infolist()}
+        self._keys = {}
+
+    def keys(self, prefix):
+        try:
+            return self._keys[prefix]
+        except KeyError:
+            n = len(prefix)
+            keys = {
+                sys.intern(name[n:]): info
+                for name, info in self.infos.items()
+                if name.startswith(prefix) and not info.is_dir() and name[n:]
+            }
+            return self._keys.setdefault(prefix, keys)
+
+    def read(self, info):
+        return self.zipfile.read(info)
+
+
+# str(path) -> _Archive
+_archives = {}
+# str(path) -> lock held while (re)opening the archive
+_locks = defaultdict(threading.Lock)
+_locks_lock = threading.Lock()
+
+
+def archive(path) -> _Archive:
+    """Return the shared open archive for a path, reopening it if it changed"""
+    path = os.fspath(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    arch = _archives.get(path)
+    if arch is not None and arch.stamp == stamp:
+        return arch
+    with _locks_lock:
+        lock = _locks[path]
+    with lock:
+        arch = _archives.get(path)
+        if arch is None or arch.stamp != stamp:
+            arch = _archives[path] = _Archive(path, stamp)
+        return arch
+
+
+class MarinaZip(Marina):
+    """Read only subclass of :class:`Marina` built on a zip archive.
+    Pairs `(key, value)` are stored as members named `prefix + key`.
+
+    :param path: The path to the zip archive
+    :type path: `pathlib.Path`
+    :param tags: A set of strings used to identify marinas
+    :param prefix: The prefix of the members holding marina entries
+    :type prefix: str
+    """
+
+    read_only = True
+
+    def __init__(self, path: Path, tags=(), prefix=DEFAULT_PREFIX):
+        if not isinstance(path, Path):
+            raise TypeError("Expected pathlib.Path instance, got", repr(path))
+        super().__init__(tags=tags)
+        self.path = path
+        self.prefix = prefix
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, tags={self.tags!r})"
+
+    def _index(self):
+        try:
+            return archive(self.path).keys(self.prefix)
+        except FileNotFoundError:
+            # like an empty directory marina
+            return {}
+
+    def __iter__(self):
+        return iter(self._index())
+
+    def __len__(self):
+        return len(self._index())
+
+    def __contains__(self, key):
+        return key in self._index()
+
+    def __getitem__(self, key):
+        return archive(self.path).read(self._index()[key]).decode()
+
+    def __setitem__(self, key, text):
+        raise TypeError(f"{type(self).__name__} is read only")
+
+    def __delitem__(self, key):
+        if key in self:
+            raise TypeError(f"{type(self).__name__} is read only")
+        raise KeyError(key)
+
+
+class ZipMemberMediator(Mediator):
+    """A class of mediators pointing to configuration content
+    stored as a member of a zip archive.
+
+    :param archive: the path to the zip archive
+    :param member: the name of the member in the archive
+    :type member: str
+    """
+
+    def __init__(self, archive, member):
+        self.archive = Path(archive)
+        self.member = member
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.archive!r}, {self.member!r})"
+
+    def read_bytes(self):
+        arch = archive(self.archive)
+        return arch.read(arch.infos[self.member])
+
+    def open_text(self, encoding="utf8"):
+        # decompress incrementally
+        arch = archive(self.archive)
+        return io.TextIOWrapper(arch.zipfile.open(arch.infos[self.member]), encoding)
+
+    def stat(self):
+        """Return the archive's path, the member's name and CRC"""
+        info = archive(self.archive).infos[self.member]
+        return (str(self.archive), self.member, info.CRC)
+
+    @classmethod
+    def schema_type(cls):
+        return ZipMemberSchema
+
+
+class ZipMemberSchema(ms.Schema):
+    """A subclass of `marshmallow.Schema` used to
+    serialize instances of :class:`ZipMemberMediator`
+    """
+
+    archive = ms.fields.Str()
+    member = ms.fields.Str()
+
+    @ms.post_load
+    def postload(self, obj, **kwargs):
+        return ZipMemberMediator(obj["archive"], obj["member"])
+
+
+def pack(dest, files, prefix=DEFAULT_PREFIX, compression=zipfile.ZIP_DEFLATED):
+    """Create a zip archive holding configuration files and their marina entries
+
+    :param dest: the path of the archive to create
+    :param files: an iterable of paths to configuration files. Their address
+        is read in their preamble
+    :param prefix: the prefix of the members holding marina entries
+    :param compression: the compression method of the members
+    :return: the list of the addresses stored in the archive
+
+    The files are stored as members ``config/{i}/{name}``. The archive is
+    written to a temporary file first and renamed, so that processes
+    reading the previous archive are not disturbed.
+    """
+    dest = Path(dest).resolve()
+    addresses = []
+    with replacing(dest) as tmp:
+        with zipfile.ZipFile(tmp, "w", compression=compression) as zf:
+            for i, file in enumerate(files):
+                data = Path(file).read_bytes()
+                address = split_preamble(io.StringIO(data.decode()))["address"]
+                member = f"config/{i}/{Path(file).name}"
+                zf.writestr(member, data)
+                zf.writestr(
+                    f"{prefix}{address}",
+                    mediator_dumps(ZipMemberMediator(dest, member)),
+                )
+                addresses.append(address)
+    return addresses
@@ -15,8 +15,20 @@ class Protocol(ABC):
     New protocols can be added by defining new subclasses of :class:`Protocol`.
     In particular, several protocol classes can be defined to handle the same
     configuration data.
+
+    .. attribute:: stateless
+
+        Set this class attribute to True if instances of the protocol class
+        don't keep any state between calls to :meth:`run`. The
+        :mod:`configoose.protocol.registry` then shares a single instance
+        of the class instead of creating a new one for each configuration.
+        Defaults to False. The attribute is not inherited: a subclass
+        of a stateless protocol is only shared if it sets the attribute
+        itself, because it may keep state in its instances.
     """
 
+    stateless = False
+
     @abstractmethod
     def run(
         self, app: "AddedProtocol", preamble: "Preamble", text: str, med: "Mediator"
@@ -31,6 +43,23 @@ class Protocol(ABC):
         """
         ...
 
+    def run_stream(
+        self, ap: "AddedProtocol", preamble: "Preamble", stream, med: "Mediator"
+    ):
+        """Configure a module according to this protocol, reading a stream
+
+        :param ap: same as in :meth:`run`
+        :param preamble: same as in :meth:`run`
+        :param stream: a text stream positioned after the preamble
+        :param med: same as in :meth:`run`
+
+        This is the method called by configurators. The default implementation
+        reads the remaining text of the stream and calls :meth:`run`. Protocols
+        able to consume configuration content incrementally can override this
+        method to avoid materializing the whole text.
+        """
+        return self.run(ap, preamble, stream.read(), med)
+
     @classmethod
     def template_text(cls) -> str:
         """Return a basic template configuration for this protocol (without preamble)
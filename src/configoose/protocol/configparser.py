@@ -1,5 +1,14 @@
 from . import abc
-from configparser import ConfigParser
+from collections.abc import Mapping
+from configparser import (
+    ConfigParser,
+    DuplicateOptionError,
+    DuplicateSectionError,
+    MissingSectionHeaderError,
+    ParsingError,
+)
+import re
+import threading
 
 
 class Protocol(abc.Protocol):
@@ -14,12 +23,170 @@ class Protocol(abc.Protocol):
     * the :class:`ConfigParser` instance used to parse the configuration.
     """
 
+    stateless = True
+
     def run(self, ap, preamble, text, med):
         parser = ConfigParser()
         parser.read_string(text)
         if handler := ap.kwargs.get("handler", None):
             handler(ap, preamble, parser)
 
+    def run_stream(self, ap, preamble, stream, med):
+        # configparser reads the stream line by line
+        parser = ConfigParser()
+        parser.read_file(stream, source=str(med.system_path() or "<configoose>"))
+        if handler := ap.kwargs.get("handler", None):
+            handler(ap, preamble, parser)
+
     @classmethod
     def template_text(cls):
         return "[section]\n"
+
+
+class LazyProtocol(Protocol):
+    """Variant of the configparser protocol parsing sections on demand
+
+    Running this protocol only scans the configuration text for the
+    section headers. The handler receives a :class:`LazySections` instance
+    instead of a :class:`ConfigParser`, which parses each section the first
+    time it is accessed. This is much faster for large files with many
+    sections when the client program reads only a few of them.
+
+    This protocol is registered with the alias :code:`"lazyconfigparser"`.
+    """
+
+    stateless = True
+
+    def run(self, ap, preamble, text, med):
+        sections = LazySections(text, source=str(med.system_path() or "<configoose>"))
+        if handler := ap.kwargs.get("handler", None):
+            handler(ap, preamble, sections)
+
+    def run_stream(self, ap, preamble, stream, med):
+        self.run(ap, preamble, stream.read(), med)
+
+
+_HEADER = re.compile(r"^\[(?P<header>.+)\]", re.MULTILINE)
+_CONTENT = re.compile(r"^[ \t]*[^\s#;]", re.MULTILINE)
+
+
+class LazySections(Mapping):
+    """Read only mapping of the sections of a configparser text, parsed lazily
+
+    :param text: the configuration text
+    :type text: str
+    :param source: the name of the source of the text, used in error messages
+    :param options: keyword arguments passed to :class:`ConfigParser`
+
+    The text is scanned once for the section headers, then sections are
+    parsed and added to the underlying parser the first time they are
+    accessed. The values of the mapping are the parser's section proxies.
+    The :code:`DEFAULT` section is parsed immediately, so that default
+    values apply to all the sections. Interpolation only sees the values
+    of the defaults and of the section itself, references to other
+    sections as with :class:`configparser.ExtendedInterpolation` require
+    that these sections were accessed before.
+    """
+
+    def __init__(self, text, source="<string>", **options):
+        self._text = text
+        self._source = source
+        self._parser = ConfigParser(**options)
+        # sections are read in this empty parser then moved to self._parser,
+        # because ConfigParser reprocesses all its sections on every read
+        self._scratch = ConfigParser(**dict(options, defaults=None))
+        self._lock = threading.Lock()
+        # section name -> (start, end, number of lines before start)
+        # of its text, or None once parsed
+        self._spans = {}
+        matches = list(_HEADER.finditer(text))
+        first = matches[0].start() if matches else len(text)
+        if (m := _CONTENT.search(text, 0, first)) is not None:
+            lineno = text.count("\n", 0, m.start()) + 1
+            line = text[m.start() :].partition("\n")[0]
+            raise MissingSectionHeaderError(source, lineno, line)
+        default = self._parser.default_section
+        offset = text.count("\n", 0, first)
+        for i, m in enumerate(matches):
+            name = m.group("header")
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            if name == default:
+                self._read(self._parser, m.start(), end, offset)
+            elif name in self._spans:
+                raise DuplicateSectionError(name, source, offset + 1)
+            else:
+                self._spans[name] = (m.start(), end, offset)
+            offset += text.count("\n", m.start(), end)
+
+    def _read(self, parser, start, end, offset):
+        try:
+            parser.read_string(self._text[start:end], self._source)
+        except (ParsingError, DuplicateOptionError, DuplicateSectionError) as exc:
+            # report line numbers in the whole text
+            raise _shift_lineno(exc, offset) from None
+
+    def _parse(self, name, start, end, offset):
+        scratch = self._scratch
+        try:
+            self._read(scratch, start, end, offset)
+            options = scratch._sections[name]
+        finally:
+            for section in scratch.sections():
+                scratch.remove_section(section)
+        self._parser.add_section(name)
+        self._parser._sections[name] = options
+
+    def __getitem__(self, name):
+        span = self._spans[name]
+        if span is not None:
+            with self._lock:
+                if (span := self._spans[name]) is not None:
+                    self._parse(name, *span)
+                    self._spans[name] = None
+        return self._parser[name]
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __contains__(self, name):
+        return name in self._spans
+
+    def sections(self):
+        """Return the list of the section names, like :meth:`ConfigParser.sections`"""
+        return list(self._spans)
+
+    def has_section(self, name):
+        return name in self._spans
+
+    @property
+    def defaults(self):
+        """The section proxy of the :code:`DEFAULT` section"""
+        return self._parser[self._parser.default_section]
+
+    def parsed(self):
+        """Return the list of the names of the sections parsed so far"""
+        return [name for name, span in self._spans.items() if span is None]
+
+    def parser(self):
+        """Parse all the remaining sections and return the underlying
+        :class:`ConfigParser` instance"""
+        for name in self._spans:
+            self[name]
+        return self._parser
+
+
+def _shift_lineno(exc, offset):
+    # return a copy of a configparser error with line numbers increased by offset
+    if isinstance(exc, ParsingError):
+        res = ParsingError(exc.source)
+        for lineno, line in exc.errors:
+            res.append(lineno + offset, line)
+        return res
+    if isinstance(exc, DuplicateOptionError):
+        return DuplicateOptionError(
+            exc.section, exc.option, exc.source, exc.lineno + offset
+        )
+    return DuplicateSectionError(exc.section, exc.source, exc.lineno + offset)
@@ -16,6 +16,8 @@ class Protocol(abc.Protocol):
     * The generated configuration item.
     """
 
+    stateless = True
+
     def run(self, ap, preamble, text, med):
         from types import ModuleType
 
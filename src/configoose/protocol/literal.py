@@ -0,0 +1,85 @@
+from . import abc
+from ..util.atomic import write_atomic
+from ast import literal_eval
+import marshal
+from pathlib import Path
+import threading
+
+
+class Protocol(abc.Protocol):
+    """The :emphasis:`literal` protocol handles pure data configurations
+
+    The text following the preamble must be a single Python literal, for
+    example a dict or a list, made of strings, bytes, numbers, tuples, lists,
+    dicts, sets, booleans and None. It is parsed with :func:`ast.literal_eval`,
+    thus no code is executed. Running this protocol calls a handler method
+    if the client code has registered one, with the arguments
+
+    * the :class:`AddedProtocol` instance that was registered by the configurator
+    * the :class:`Preamble` extracted from the configuration file
+    * the value of the literal
+
+    The parsed value is cached in :mod:`marshal` format in a hidden file
+    ``.NAME.marshal`` next to the configuration file, and in memory. The cache
+    is keyed by the file's modification time and size, so that unchanged
+    configurations are loaded without being read nor parsed. Failing to
+    write the cache file is not an error.
+    """
+
+    stateless = True
+
+    # str(system path) -> (stamp, marshalled value)
+    _memory = {}
+    _lock = threading.Lock()
+
+    def run(self, ap, preamble, text, med):
+        self._call_handler(ap, preamble, literal_eval(text.strip()))
+
+    def run_stream(self, ap, preamble, stream, med):
+        path, stamp = med.system_path(), med.stat()
+        if path is None or stamp is None:
+            return self.run(ap, preamble, stream.read(), med)
+        key = str(path)
+        data = self._load(key, stamp)
+        if data is None:
+            value = literal_eval(stream.read().strip())
+            data = marshal.dumps(value)
+            self._store(key, stamp, data)
+        # a fresh object for each handler call
+        self._call_handler(ap, preamble, marshal.loads(data))
+
+    def _call_handler(self, ap, preamble, value):
+        if handler := ap.kwargs.get("handler", None):
+            handler(ap, preamble, value)
+
+    @staticmethod
+    def cache_path(path):
+        """Return the path of the cache file for a configuration file"""
+        path = Path(path)
+        return path.with_name(f".{path.name}.marshal")
+
+    def _load(self, key, stamp):
+        entry = self._memory.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        try:
+            cached_stamp, data = marshal.loads(self.cache_path(key).read_bytes())
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        if tuple(cached_stamp) != tuple(stamp):
+            return None
+        with self._lock:
+            self._memory[key] = (stamp, data)
+        return data
+
+    def _store(self, key, stamp, data):
+        with self._lock:
+            self._memory[key] = (stamp, data)
+        try:
+            write_atomic(self.cache_path(key), marshal.dumps((tuple(stamp), data)))
+        except OSError:
+            pass
+
+    @classmethod
+    def template_text(cls):
+        return "{}\n"
@@ -26,6 +26,8 @@ class Protocol(abc.Protocol):
     how to configure a file with this protocol.
     """
 
+    stateless = True
+
     def run(self, ap, preamble, text, med):
         from types import ModuleType
 
@@ -11,8 +11,21 @@ class Protocol(abc.Protocol):
     * the :class:`Preamble` extracted from the configuration file
     * the text contained in the configuration
     * the :class:`Mediator` instance used to access the configuration
+
+    If the protocol was added with a true `stream` keyword argument, as in
+    `cfg.add_protocol("raw", handler=handler, stream=True)`, the handler
+    receives a text stream positioned after the preamble instead of the
+    text. This allows handlers to consume large configurations incrementally.
     """
 
+    stateless = True
+
     def run(self, ap, preamble, text, med):
         if handler := ap.kwargs.get("handler", None):
             handler(ap, preamble, text, med)
+
+    def run_stream(self, ap, preamble, stream, med):
+        if not ap.kwargs.get("stream", False):
+            return self.run(ap, preamble, stream.read(), med)
+        if handler := ap.kwargs.get("handler", None):
+            handler(ap, preamble, stream, med)
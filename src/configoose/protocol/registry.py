@@ -0,0 +1,141 @@
+"""Process-wide registry of protocol classes
+
+Protocol classes are designated by dotted paths such as
+``"configoose.protocol.raw.Protocol"``. Resolving such a path
+imports modules and walks attributes, which this module does
+only once per path: resolved classes are memoized, and instances
+of protocol classes declared :attr:`stateless` are shared.
+
+Short aliases can be registered for protocol paths, for example
+``"raw"`` for ``"configoose.protocol.raw.Protocol"``. Aliases
+are resolved by a single dict lookup and don't import anything
+until the protocol is actually used.
+
+Installed distributions can also declare aliases as entry points
+in the group ``"configoose.protocols"``, see
+:mod:`configoose.util.entrypoints`. These are looked up only for
+names that are neither dotted paths nor registered aliases.
+"""
+from ..util.digattr import dig
+from ..util.entrypoints import EntryPointIndex
+import threading
+
+# alias -> full dotted protopath
+_aliases = {
+    name: f"{__package__}.{name}.Protocol"
+    for name in ("configparser", "iterative", "literal", "methodic", "raw")
+}
+_aliases["lazyconfigparser"] = f"{__package__}.configparser.LazyProtocol"
+# full dotted protopath -> protocol class
+_classes = {}
+# protocol class -> shared instance
+_instances = {}
+_lock = threading.Lock()
+
+plugins = EntryPointIndex("configoose.protocols")
+
+
+def canonical(protopath: str) -> str:
+    """Return the full dotted path designated by a protopath or an alias
+
+    :param protopath: a dotted path or a registered alias
+    :type protopath: str
+    :rtype: str
+    """
+    try:
+        return _aliases[protopath]
+    except KeyError:
+        pass
+    if "." not in protopath and protopath in plugins:
+        # convert the entry point's "module:attr" to a dotted path,
+        # this doesn't import the module.
+        module, _, attr = plugins[protopath].value.partition(":")
+        attr = attr.split("[", 1)[0].strip()
+        return _aliases.setdefault(protopath, f"{module.strip()}.{attr}".rstrip("."))
+    return protopath
+
+
+def register(alias: str, protocol=None):
+    """Register a short alias for a protocol
+
+    :param alias: the short name to register
+    :type alias: str
+    :param protocol: a dotted path or a protocol class. If omitted, the
+        function returns a decorator to apply to a protocol class.
+
+    Registering a dotted path doesn't import the target module. Registering
+    a class also stores it in the cache of resolved classes, thus
+
+    .. code-block:: python
+
+        @registry.register("toml")
+        class TomlProtocol(abc.Protocol):
+            ...
+
+    makes the lookup of both ``"toml"`` and the class' full path a dict hit.
+    """
+    if protocol is None:
+        def decorator(cls):
+            register(alias, cls)
+            return cls
+
+        return decorator
+    if isinstance(protocol, str):
+        protopath = canonical(protocol)
+    else:
+        protopath = f"{protocol.__module__}.{protocol.__qualname__}"
+        _classes[protopath] = protocol
+    _aliases[alias] = protopath
+    return protocol
+
+
+def resolve(protopath: str):
+    """Return the protocol class designated by a protopath or an alias
+
+    :param protopath: a dotted path or a registered alias
+    :type protopath: str
+    :return: a subclass of :class:`configoose.protocol.abc.Protocol`
+
+    The first call for a given path imports the target through
+    :func:`configoose.util.digattr.dig`. Subsequent calls are dict hits.
+    """
+    protopath = canonical(protopath)
+    try:
+        return _classes[protopath]
+    except KeyError:
+        pass
+    cls = dig(*protopath.split("."))
+    return _classes.setdefault(protopath, cls)
+
+
+def instance(protopath: str):
+    """Return an instance of the protocol class designated by a protopath
+
+    :param protopath: a dotted path or a registered alias
+    :type protopath: str
+
+    A single instance is shared by all the callers if the protocol class
+    itself declares `stateless = True`, otherwise a new instance is created
+    on each call. The declaration is not inherited from base classes.
+    """
+    cls = resolve(protopath)
+    if not cls.__dict__.get("stateless", False):
+        return cls()
+    try:
+        return _instances[cls]
+    except KeyError:
+        with _lock:
+            if cls not in _instances:
+                _instances[cls] = cls()
+            return _instances[cls]
+
+
+def clear():
+    """Forget all resolved classes and shared instances
+
+    Registered aliases are kept. This is mainly useful after reloading
+    a module that defines protocol classes.
+    """
+    with _lock:
+        _classes.clear()
+        _instances.clear()
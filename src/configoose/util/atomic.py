@@ -0,0 +1,51 @@
+"""Atomic replacement of files
+
+Files read by other processes are written to a temporary file in the
+same directory, which is then renamed over the destination, so that
+readers see either the old content or the new one. The temporary file
+is named ``.NAME.PID.TID.tmp``, unique per process and thread, and
+removed if anything fails before the rename. Marinas skip these names
+when they list their keys.
+"""
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import threading
+
+
+def temporary_path(path) -> Path:
+    """Return the temporary path used to replace a file atomically
+
+    :param path: the path of the destination file
+    """
+    path = Path(path)
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+@contextmanager
+def replacing(path):
+    """Context manager yielding a temporary path which replaces a file on exit
+
+    :param path: the path of the destination file
+
+    The caller creates the temporary file, or symbolic link, in the body
+    of the `with` statement. It is renamed to `path` if the body succeeds,
+    otherwise it is removed and the destination is left unchanged.
+    """
+    tmp = temporary_path(path)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(path, data: bytes):
+    """Replace the content of a file atomically
+
+    :param path: the path of the file
+    :param data: the new content
+    """
+    with replacing(path) as tmp:
+        tmp.write_bytes(data)
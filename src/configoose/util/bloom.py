@@ -0,0 +1,90 @@
+"""A small Bloom filter of strings
+
+A Bloom filter is a compact summary of a set of strings which answers
+membership queries with no false negatives and a small rate of false
+positives. Marinas use it to skip lookups of keys they cannot contain.
+
+The hash functions don't depend on the process, so that filters can be
+saved to files with :meth:`BloomFilter.dumps` and shared between
+processes.
+"""
+from hashlib import blake2b
+import math
+import struct
+
+_MAGIC = b"CFGBLOOM"
+_HEADER = struct.Struct("<8sqQQ")
+
+
+class BloomFilter:
+    """A Bloom filter of strings
+
+    :param nbits: the number of bits of the filter
+    :param nhashes: the number of hash functions
+    :param bits: the initial bits, defaults to all zeros
+
+    Use :meth:`for_keys` to create a filter sized for a set of keys.
+    """
+
+    __slots__ = ("nbits", "nhashes", "bits")
+
+    def __init__(self, nbits, nhashes, bits=None):
+        self.nbits = nbits
+        self.nhashes = nhashes
+        self.bits = bytearray((nbits + 7) // 8) if bits is None else bytearray(bits)
+
+    @classmethod
+    def for_keys(cls, keys, fp_rate=0.01):
+        """Return a filter containing keys
+
+        :param keys: a collection of strings
+        :param fp_rate: the expected rate of false positives
+        """
+        keys = list(keys)
+        n = max(len(keys), 16)
+        nbits = max(64, math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2))
+        nhashes = max(1, round(nbits / n * math.log(2)))
+        res = cls(nbits, nhashes)
+        for key in keys:
+            res.add(key)
+        return res
+
+    def _positions(self, key):
+        d = blake2b(key.encode("utf8", "surrogateescape"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        m = self.nbits
+        return ((h1 + i * h2) % m for i in range(self.nhashes))
+
+    def add(self, key):
+        bits = self.bits
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def dumps(self, stamp=0):
+        """Serialize the filter as bytes
+
+        :param stamp: an integer stored with the filter, for example the
+            modification time of the data it summarizes
+        """
+        return _HEADER.pack(_MAGIC, stamp, self.nbits, self.nhashes) + self.bits
+
+    @classmethod
+    def loads(cls, data):
+        """Deserialize a filter
+
+        :return: a pair `(filter, stamp)`
+        :raises ValueError: if data is not a serialized filter
+        """
+        try:
+            magic, stamp, nbits, nhashes = _HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("Not a serialized Bloom filter") from None
+        bits = data[_HEADER.size :]
+        if magic != _MAGIC or len(bits) != (nbits + 7) // 8 or not nhashes:
+            raise ValueError("Not a serialized Bloom filter")
+        return cls(nbits, nhashes, bits), stamp
@@ -0,0 +1,90 @@
+"""Lazy access to the entry points of a group
+
+Installed distributions can extend configoose by declaring entry
+points, for example in their ``pyproject.toml``
+
+.. code-block:: toml
+
+    [project.entry-points."configoose.protocols"]
+    toml = "yourmodule:TomlProtocol"
+
+    [project.entry-points."configoose.marina_styles"]
+    sqlite = "yourmodule:sqlite_marina"
+
+The installed metadata is scanned only the first time a name is looked
+up in a group, and the target object of an entry point is imported only
+when it is loaded. Neither happens at configoose's import time.
+"""
+from collections.abc import Mapping
+import threading
+
+
+def _entry_points(group):
+    from importlib import metadata
+
+    eps = metadata.entry_points()
+    if hasattr(eps, "select"):
+        return eps.select(group=group)
+    # python < 3.10 returns a dict of lists
+    return eps.get(group, ())
+
+
+class EntryPointIndex(Mapping):
+    """Read only mapping name -> entry point for a given group
+
+    :param group: the name of the entry points group
+    :type group: str
+
+    The index is built once, on first access. Objects loaded through
+    :meth:`load` are cached.
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self._index = None
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.group!r})"
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    index = {}
+                    for ep in _entry_points(self.group):
+                        # first distribution wins, like on sys.path
+                        index.setdefault(ep.name, ep)
+                    self._index = index
+        return self._index
+
+    def __getitem__(self, name):
+        return self.index[name]
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def load(self, name):
+        """Import and return the object designated by an entry point
+
+        :param name: the entry point's name
+        :type name: str
+        :raises KeyError: if there is no such entry point in the group
+        """
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        obj = self[name].load()
+        return self._loaded.setdefault(name, obj)
+
+    def invalidate(self):
+        """Forget the index, for example after installing new distributions"""
+        with self._lock:
+            self._index = None
+            self._loaded.clear()
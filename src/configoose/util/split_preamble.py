@@ -1,6 +1,7 @@
 from .digattr import dig
 from ast import literal_eval
 import itertools as itt
+import sys
 from token import OP, NL, NEWLINE, COMMENT
 from tokenize import generate_tokens
 
@@ -10,11 +11,71 @@ class InvalidPreamble(Exception):
 
 
 class Preamble(dict):
-    pass
+    __slots__ = ()
 
 
 def split_preamble(infile, eval=True):
-    readline = infile.readline
+    """Read the preamble at the beginning of a text stream
+
+    :param infile: a text stream. On return, it is positioned at the
+        beginning of the line following the preamble
+    :param eval: if false, return the preamble's source code instead
+        of a :class:`Preamble`
+    """
+    source_code = _read_preamble(infile.readline)
+    return _eval_preamble(source_code) if eval else source_code
+
+
+def split_preamble_buffer(data, eval=True, encoding="utf8"):
+    """Find the preamble at the beginning of a string or a bytes-like object
+
+    :param data: a str, bytes, bytearray or memoryview
+    :param eval: same as in :func:`split_preamble`
+    :param encoding: encoding used to decode bytes-like data
+    :return: a pair `(preamble, offset)` where offset is the index in data
+        of the line following the preamble
+
+    Unlike :func:`split_preamble`, nothing but the preamble is copied, so that
+    the body can be accessed without copy as `memoryview(data)[offset:]`
+    for bytes-like data.
+    """
+    if isinstance(data, str):
+        newline, decode = "\n", None
+    else:
+        if not isinstance(data, (bytes, bytearray)):
+            data = memoryview(data).cast("B")
+        newline, decode = 10, lambda b: bytes(b).decode(encoding)
+    pos = 0
+
+    def readline():
+        nonlocal pos
+        if pos >= len(data):
+            return ""
+        end = _find(data, newline, pos)
+        end = len(data) if end < 0 else end + 1
+        line, pos = data[pos:end], end
+        return decode(line) if decode else line
+
+    source_code = _read_preamble(readline)
+    preamble = _eval_preamble(source_code) if eval else source_code
+    return preamble, pos
+
+
+def _find(data, newline, start):
+    if not isinstance(data, memoryview):
+        return data.find(newline, start)
+    # memoryview has no find() method, search fixed size chunks
+    size = 4096
+    while start < len(data):
+        chunk = bytes(data[start : start + size])
+        if (i := chunk.find(newline)) >= 0:
+            return start + i
+        start += size
+    return -1
+
+
+def _read_preamble(readline):
+    # consume the lines of the preamble, return its source code
     buffer = []
 
     def rdline():
@@ -42,15 +103,25 @@ def split_preamble(infile, eval=True):
                     break
     else:
         raise InvalidPreamble("Unterminated literal dictionary")
-    source_code = "".join(buffer)
-    if eval:
-        D = literal_eval(source_code)
-        return Preamble(
-            address=D["address"],
-            protopath=D["protopath"],
-        )
-    else:
-        return source_code
+    return "".join(buffer)
+
+
+def _eval_preamble(source_code):
+    D = literal_eval(source_code)
+    preamble = Preamble(
+        address=sys.intern(D["address"]),
+        protopath=D["protopath"],
+    )
+    if "requires" in D:
+        requires = D["requires"]
+        if not isinstance(requires, (list, tuple)) or not all(
+            isinstance(r, str) for r in requires
+        ):
+            raise InvalidPreamble(
+                "Expected a list of addresses for 'requires'", requires
+            )
+        preamble["requires"] = tuple(requires)
+    return preamble
 
 
 if __name__ == "__main__":